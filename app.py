@@ -1,16 +1,21 @@
 import streamlit as st
-import subprocess
+import html
 import re
 import pandas as pd
 import os
 import json
-from config import CSV_OUTPUT, KNOWLEDGE_FOLDER, OPENAPI_YAML_PATH
+from config import REPORT_OUTPUT, RESULTS_DB_PATH, KNOWLEDGE_FOLDER, OPENAPI_YAML_PATH, DASHBOARD_LOG_LINES
 from openapi.loader import load_openapi, pick_base_url
-from openapi.operations import collect_operations
+from openapi.operations import get_operations
+from tests.reporter import load_report, read_report_row, read_response_body
+from tests.result_store import ResultStore
+from tests.background_runner import BackgroundRunner
+from main import run_api_tests
 
 PERPLEXITY_API_KEY = st.secrets["PERPLEXITY_API_KEY"]
 # Config
-CSV_FILE = CSV_OUTPUT
+REPORT_FILE = REPORT_OUTPUT
+RESULTS_DB = RESULTS_DB_PATH
 KB_FOLDER = KNOWLEDGE_FOLDER
 
 BASE_URL_OVERRIDE = None  # update if needed
@@ -50,13 +55,13 @@ tab1, tab2, tab3 = st.tabs([
     "3️⃣ Knowledge Base Chat"
 ])
 
-# Load OpenAPI spec and operations once at start
-@st.cache_data(show_spinner=False)
+# The spec and operations are cached by the loader (in process and on disk),
+# so reruns get the same objects until the spec file changes
 def load_apis():
     try:
         spec = load_openapi(OPENAPI_YAML_PATH)
         base_url = pick_base_url(spec, BASE_URL_OVERRIDE)
-        operations = collect_operations(spec, base_url)
+        operations = get_operations(spec, base_url)
         return operations
     except Exception as e:
         st.error(f"Error loading OpenAPI spec: {e}")  # Show real error in UI
@@ -64,6 +69,64 @@ def load_apis():
 
 operations = load_apis()
 
+# Columns shown in the test case table; bodies and notes are read per selected row.
+TABLE_COLUMNS = [
+    "Description", "Endpoint", "Method", "URL", "ExpectedStatus", "ActualStatus",
+    "TestStatus", "LLMVerdict", "ElapsedSecs"
+]
+DETAIL_COLUMNS = [
+    "Description", "RequestHeaders", "RequestBody", "ActualResponseSnippet", "ActualStatus",
+    "ExpectedStatus", "TestStatus", "LLMVerdict", "LLMNotes", "ElapsedSecs",
+    "ResponseBodyOffset", "ResponseBodyLength"
+]
+
+# mtime is part of the cache key so a new report is picked up on the next rerun
+@st.cache_data(show_spinner=False)
+def load_report_table(path, mtime):
+    return load_report(path, TABLE_COLUMNS)
+
+# Opened read-only on every script run and closed at the end of the tab, so
+# sessions never share a connection with each other or with a running test
+def open_result_store(path):
+    return ResultStore(path, read_only=True)
+
+def get_runner():
+    if "test_runner" not in st.session_state:
+        st.session_state.test_runner = BackgroundRunner(run_api_tests, DASHBOARD_LOG_LINES)
+    return st.session_state.test_runner
+
+# Re-renders itself every second while a run is in progress
+@st.fragment(run_every=1.0)
+def render_run_progress():
+    progress = get_runner().poll()
+    if progress["finished"]:
+        # Full rerun so the run button is enabled again
+        st.rerun()
+    if not progress["started"]:
+        return
+
+    done_col, pass_col, fail_col, rate_col = st.columns(4)
+    done_col.metric("Tests done", progress["done"])
+    pass_col.metric("Passed", progress["passed"])
+    fail_col.metric("Failed", progress["failed"])
+    rate_col.metric("Throughput", f"{progress['throughput']:.1f} tests/s")
+    if progress["operations"]:
+        st.progress(progress["operations_done"] / progress["operations"],
+                    text=f"Operations: {progress['operations_done']}/{progress['operations']}")
+
+    logs_html = "<br>".join(colorize_api_log(html.escape(line)) for line in progress["lines"])
+    st.markdown(
+        f"<div style='height:400px;overflow:auto;background:#111;color:#eee;font-family:monospace;border-radius:8px;padding:10px;'>{logs_html}</div>",
+        unsafe_allow_html=True,
+    )
+
+    if progress["running"]:
+        st.info("Tests running... logs will appear below.")
+    elif progress["error"]:
+        st.error(f"❌ Test runner failed:\n{progress['error']}")
+    else:
+        st.success(f"✅ Tests completed successfully. {progress['summary']}")
+
 with tab1:
     st.header("Select APIs to Run")
     st.write("Choose which APIs to run, then click 'Run API Tests'.")
@@ -84,88 +147,56 @@ with tab1:
             if not selected_indices:
                 st.warning("Select at least one API or check 'Run All APIs'.")
 
-        logs_html = ""
-
-        if st.button("▶ Run API Tests", type="primary"):
-            st.info("Tests running... logs will appear below.")
-            log_container = st.empty()
+        runner = get_runner()
 
+        if st.button("▶ Run API Tests", type="primary", disabled=runner.running):
             ops_to_run = operations if run_all else [operations[i] for i in selected_indices]
+            runner = st.session_state.test_runner = BackgroundRunner(run_api_tests, DASHBOARD_LOG_LINES)
+            runner.start(selected_operations=ops_to_run)
 
-            import tempfile
-            import json as jsonlib
-
-            # Save selected API paths to temp filter file
-            with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json") as f:
-                jsonlib.dump([op["path"] for op in ops_to_run], f)
-                filter_file_path = f.name
-
-            command = ["python", "main.py", "--run-tests", "--filter-file", filter_file_path]
-
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-            )
-
-            line_count = 0
-            for line in process.stdout:
-                line = line.strip()
-                if line:
-                    styled_line = colorize_api_log(line)
-                    logs_html += styled_line + "<br>"
-                    line_count += 1
-
-                # Update every 20 lines or on last line
-                if line_count % 20 == 0:
-                    try:
-                        log_container.markdown(
-                            f"<div style='height:400px;overflow:auto;background:#111;color:#eee;font-family:monospace;border-radius:8px;padding:10px;'>{logs_html}</div>",
-                            unsafe_allow_html=True,
-                        )
-                    except Exception:
-                        break
-
-            process.wait()
-            # Final update after process ends
-            try:
-                log_container.markdown(
-                    f"<div style='height:400px;overflow:auto;background:#111;color:#eee;font-family:monospace;border-radius:8px;padding:10px;'>{logs_html}</div>",
-                    unsafe_allow_html=True,
-                )
-            except Exception:
-                pass
-
-            if process.returncode != 0:
-                error_output = process.stderr.read()
-                st.error(f"❌ Test runner failed:\n{error_output}")
-            else:
-                st.success("✅ Tests completed successfully.")
+        render_run_progress()
 
 with tab2:
     st.header("Generated Test Cases")
 
-    if not os.path.exists(CSV_FILE):
-        st.warning(f"No test results found at {CSV_FILE}. Please run the tests first.")
-    else:
-        df = pd.read_csv(CSV_FILE)
+    store = open_result_store(RESULTS_DB) if os.path.exists(RESULTS_DB) else None
+    runs = store.list_runs() if store else []
 
-        if "TestStatus" in df.columns:
-            status_list = ["All"] + sorted(df["TestStatus"].dropna().unique().tolist())
+    if not runs and not os.path.exists(REPORT_FILE):
+        st.warning(f"No test results found at {RESULTS_DB} or {REPORT_FILE}. Please run the tests first.")
+    else:
+        if runs:
+            st.markdown("**Run History:**")
+            history = pd.DataFrame(runs)
+            history["started_at"] = pd.to_datetime(history["started_at"], unit="s")
+            history["finished_at"] = pd.to_datetime(history["finished_at"], unit="s")
+            st.dataframe(history, width='stretch', height=150)
+
+            run_ids = [run["id"] for run in runs]
+            run_id = st.selectbox("Run:", run_ids)
+            if run_ids.index(run_id) + 1 < len(run_ids):
+                previous_run_id = run_ids[run_ids.index(run_id) + 1]
+                regressions = store.regressions(run_id, previous_run_id)
+                with st.expander(f"Regressions since run {previous_run_id}: {len(regressions)}"):
+                    st.dataframe(regressions.drop(columns=["ResultId"]), width='stretch')
+
+            status_list = ["All"] + store.test_statuses(run_id)
+            status_filter = st.selectbox("Filter by Test Status:", status_list)
+            # Filtered by the (run_id, test_status) index rather than in pandas
+            filtered_df = store.query_results(run_id, None if status_filter == "All" else status_filter)
         else:
-            status_list = ["All"]
+            df = load_report_table(REPORT_FILE, os.path.getmtime(REPORT_FILE))
 
-        status_filter = st.selectbox("Filter by Test Status:", status_list)
+            if "TestStatus" in df.columns:
+                status_list = ["All"] + sorted(df["TestStatus"].dropna().unique().tolist())
+            else:
+                status_list = ["All"]
+
+            status_filter = st.selectbox("Filter by Test Status:", status_list)
 
-        filtered_df = df if status_filter == "All" else df[df["TestStatus"] == status_filter]
+            filtered_df = df if status_filter == "All" else df[df["TestStatus"] == status_filter]
 
-        display_cols = [
-            "Description", "Endpoint", "Method", "URL", "ExpectedStatus", "ActualStatus",
-            "TestStatus", "ActualResponseSnippet", "LLMVerdict", "ElapsedSecs"
-        ]
-        display_cols = [col for col in display_cols if col in filtered_df.columns]
+        display_cols = [col for col in TABLE_COLUMNS if col in filtered_df.columns]
 
         st.dataframe(filtered_df[display_cols], width='stretch', height=300)
 
@@ -176,7 +207,10 @@ with tab2:
             value=0
         )
 
-        test_case = filtered_df.iloc[test_case_index]
+        if runs:
+            test_case = store.get_result(int(filtered_df["ResultId"].iloc[test_case_index]))
+        else:
+            test_case = read_report_row(REPORT_FILE, int(filtered_df.index[test_case_index]), DETAIL_COLUMNS)
 
         st.subheader("Test Case Details")
         st.markdown("**Description:**")
@@ -199,7 +233,10 @@ with tab2:
             st.text(test_case.get("RequestBody", ""))
 
         st.markdown("**Actual Response Snippet:**")
-        st.text(test_case.get("ActualResponseSnippet", ""))
+        full_body = None
+        if pd.notna(test_case.get("ResponseBodyOffset")):
+            full_body = read_response_body(REPORT_FILE, test_case["ResponseBodyOffset"], test_case["ResponseBodyLength"])
+        st.text(full_body if full_body is not None else test_case.get("ActualResponseSnippet", ""))
 
         st.markdown(f"**Actual Status:** {test_case.get('ActualStatus', '')}")
         st.markdown(f"**Expected Status:** {test_case.get('ExpectedStatus', '')}")
@@ -208,6 +245,9 @@ with tab2:
         st.markdown(f"**LLM Notes:** {test_case.get('LLMNotes', '')}")
         st.markdown(f"**Elapsed Time (secs):** {test_case.get('ElapsedSecs', '')}")
 
+    if store:
+        store.close()
+
 with tab3:
     st.header("Knowledge Base Chat (Multi-turn)")
 
@@ -225,7 +265,7 @@ with tab3:
     if user_input := st.chat_input("Ask questions about the API or docs..."):
         try:
             from knowledgebase.kb_handler import KnowledgeBase
-            from llm_client import chat
+            from llm_client import get_chat
 
             kb = KnowledgeBase(KB_FOLDER)
 
@@ -234,8 +274,10 @@ with tab3:
                 msg["content"] for msg in st.session_state.chat_history if msg["role"] == "user"
             ) + " " + user_input
 
-            relevant_chunks = kb.query(kb_query)
-            context_text = "\n---\n".join(relevant_chunks) if relevant_chunks else "No relevant knowledge base entries found."
+            relevant_chunks = kb.query_with_sources(kb_query)
+            context_text = "\n---\n".join(
+                f"[{c['source']} p.{c['page']}]\n{c['text']}" for c in relevant_chunks
+            ) if relevant_chunks else "No relevant knowledge base entries found."
 
             system_content = f"""
 You are a helpful assistant specialized in APIs and troubleshooting.
@@ -247,6 +289,7 @@ Instructions:
 - Use the context to answer the user's questions.
 - If the context contains no answer, respond politely that information is not available in the knowledge base.
 - Provide clear and concise explanations.
+- Cite the sources you used as [file p.page], as given above each context entry.
 - Ask for clarifications if needed.
 """
 
@@ -258,7 +301,7 @@ Instructions:
             # Add user message to chat history and update UI immediately
             st.session_state.chat_history.append({"role": "user", "content": user_input})
 
-            response = chat.invoke(messages)
+            response = get_chat().invoke(messages)
             answer = response.content if hasattr(response, "content") else str(response)
 
             # Add assistant message to chat history
@@ -13,3 +13,38 @@ CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 TOP_K = 3
 
+CONCURRENCY = 1
+# Cap on requests in flight against one host; None uses --concurrency
+PER_HOST_CONCURRENCY = None
+HTTP_POOL_SIZE = 10
+# "exhaustive" (every field combination up to max_comb) or "covering" (t-way covering array)
+COMBINATORIAL_STRATEGY = "covering"
+COMBINATORIAL_STRENGTH = 2
+COMBINATORIAL_BUDGET = 200
+COMBINATORIAL_SEED = 42
+LLM_CACHE_PATH = r"./reports/llm_verdict_cache.json"
+LLM_CACHE_TTL_SECS = 7 * 24 * 3600
+LLM_CACHE_MAX_ENTRIES = 5000
+LLM_BATCH_SIZE = 5
+LLM_CONCURRENCY = 4
+LLM_REQUESTS_PER_MINUTE = 50
+LLM_PROMPT_TOKEN_BUDGET = 3000
+KB_INDEX_DIR = r"./reports/kb_index"
+# Parsed OpenAPI specs, keyed by file hash
+SPEC_CACHE_DIR = r"./reports/spec_cache"
+# "keyword" (BM25), "semantic" (embeddings) or "hybrid"
+KB_RETRIEVAL_MODE = "keyword"
+# Local sentence-transformers model name or path; None uses hashed TF-IDF vectors
+KB_EMBEDDING_MODEL = None
+KB_HYBRID_WEIGHT = 0.5
+KB_QUERY_CACHE_SIZE = 1024
+# Response bodies longer than this many characters go to the report's .bodies side file
+REPORT_BODY_LIMIT = 2000
+# Report file format: "csv", "jsonl" or "parquet" (needs pyarrow)
+REPORT_FORMAT = "csv"
+REPORT_OUTPUT = CSV_OUTPUT.rsplit(".", 1)[0] + "." + REPORT_FORMAT
+# Run history (SQLite); results are inserted this many rows per transaction
+RESULTS_DB_PATH = r"./reports/results.sqlite"
+RESULTS_DB_BATCH_SIZE = 200
+# Recent log lines kept by the dashboard while tests run
+DASHBOARD_LOG_LINES = 500
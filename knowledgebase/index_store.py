@@ -0,0 +1,320 @@
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import time
+from array import array
+from bisect import bisect_right
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from knowledgebase.vector_index import embed_chunks
+from utils.file_utils import (
+    SUPPORTED_EXTENSIONS,
+    extraction_stats,
+    extraction_tasks,
+    iter_pages,
+    print_extraction_stats,
+    run_extraction_tasks,
+)
+from utils.text_utils import BM25Index, iter_chunks
+
+# Bump when the on-disk layout changes so old indexes are rebuilt.
+INDEX_VERSION = 2
+
+
+class MappedChunks:
+    """
+    Read-only list of chunks backed by memory-mapped per-document files.
+    Chunks are decoded on access, so opening an index costs no more than
+    reading the offset tables. source(i) gives the (file name, page) a chunk
+    starts on, for citations.
+    """
+
+    def __init__(self):
+        self._maps: List[mmap.mmap] = []
+        self._offsets: List[array] = []
+        self._pages: List[array] = []
+        self._names: List[str] = []
+        self._starts: List[int] = []
+        self._count = 0
+
+    def add_document(self, data_path: str, offsets_path: str, pages_path: str, name: str) -> None:
+        offsets, pages = array("Q"), array("I")
+        with open(offsets_path, "rb") as f:
+            offsets.frombytes(f.read())
+        if len(offsets) < 2:
+            return
+        with open(pages_path, "rb") as f:
+            pages.frombytes(f.read())
+        with open(data_path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        self._offsets.append(offsets)
+        self._pages.append(pages)
+        self._names.append(name)
+        self._starts.append(self._count)
+        self._count += len(offsets) - 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def _locate(self, i: int) -> Tuple[int, int]:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("chunk index out of range")
+        doc = bisect_right(self._starts, i) - 1
+        return doc, i - self._starts[doc]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        doc, local = self._locate(i)
+        offsets = self._offsets[doc]
+        return self._maps[doc][offsets[local]:offsets[local + 1]].decode("utf-8")
+
+    def source(self, i: int) -> Tuple[str, int]:
+        doc, local = self._locate(i)
+        return self._names[doc], self._pages[doc][local]
+
+    def close(self) -> None:
+        for mapped in self._maps:
+            mapped.close()
+        self._maps.clear()
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        # Still mapped by another KnowledgeBase (Windows) or already gone
+        pass
+
+
+def document_pages(path: str, name: str, first_page: Optional[int] = None, last_page: Optional[int] = None):
+    """Pages of a document (or page range), the first one starting with the document banner."""
+    pages = iter_pages(path, first_page, last_page)
+    if not first_page:
+        pages = chain([(1, f"\n\n=== Document: {name} ===\n\n")], pages)
+    return pages
+
+
+def _index_part(
+    path: str,
+    first_page: Optional[int],
+    last_page: Optional[int],
+    base: str,
+    name: str,
+    chunk_size: int,
+    overlap: int,
+) -> Tuple[str, int, float, Optional[str]]:
+    """
+    Stream one document, or one page range of a large PDF, into base.chunks,
+    base.offsets and base.pages. Runs in a worker process and only ever holds
+    one page plus one chunk of text.
+    """
+    start = time.perf_counter()
+    chars = 0
+    offsets, page_numbers = array("Q", [0]), array("I")
+    try:
+        with open(f"{base}.chunks.tmp", "wb") as f:
+            for chunk, page in iter_chunks(document_pages(path, name, first_page, last_page), chunk_size, overlap):
+                data = chunk.encode("utf-8")
+                f.write(data)
+                offsets.append(offsets[-1] + len(data))
+                page_numbers.append(page)
+                chars += len(chunk)
+        os.replace(f"{base}.chunks.tmp", f"{base}.chunks")
+        _atomic_write(f"{base}.offsets", offsets.tobytes())
+        _atomic_write(f"{base}.pages", page_numbers.tobytes())
+        return base, chars, time.perf_counter() - start, None
+    except Exception as e:
+        return base, chars, time.perf_counter() - start, str(e)
+
+
+def chunk_part(
+    path: str,
+    first_page: Optional[int],
+    last_page: Optional[int],
+    name: str,
+    chunk_size: int,
+    overlap: int,
+) -> Tuple[List[Tuple[str, int]], int, float, Optional[str]]:
+    """
+    The (chunk, page) pairs of one document, or one page range of a large
+    PDF, for knowledge bases without an index directory. Runs in a worker
+    process like _index_part.
+    """
+    start = time.perf_counter()
+    try:
+        chunks = list(iter_chunks(document_pages(path, name, first_page, last_page), chunk_size, overlap))
+        return chunks, sum(len(chunk) for chunk, _ in chunks), time.perf_counter() - start, None
+    except Exception as e:
+        return [], 0, time.perf_counter() - start, str(e)
+
+
+class IndexStore:
+    """
+    Persistent knowledge base index in index_dir:
+    - manifest.json: per document path, its mtime, size and part files,
+    - <digest>.chunks / .offsets / .pages: the chunks of a document (or of a
+      page range of a large PDF) as UTF-8 text, a uint64 offset table and
+      the page each chunk starts on, opened with mmap,
+    - bm25.pkl: the search index over all chunks,
+    - vectors.npy / vectors.pkl: chunk embeddings and embedder state for
+      semantic retrieval (see load_vectors).
+    refresh() re-extracts only documents whose mtime or size changed and
+    rebuilds the search index only when some document changed. Changed
+    documents are streamed page by page straight into their part files by
+    up to max_workers processes.
+    """
+
+    def __init__(self, index_dir: str, chunk_size: int = 1000, overlap: int = 200, max_workers: int = None):
+        self.index_dir = index_dir
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.manifest_path = os.path.join(index_dir, "manifest.json")
+        self.search_index_path = os.path.join(index_dir, "bm25.pkl")
+        self.changed = True
+
+    def _load_manifest(self) -> Dict:
+        settings = {"version": INDEX_VERSION, "chunk_size": self.chunk_size, "overlap": self.overlap}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        if manifest.get("settings") != settings:
+            manifest = {"settings": settings, "documents": {}}
+        return manifest
+
+    def _paths(self, file_id: str) -> Tuple[str, str, str]:
+        base = os.path.join(self.index_dir, file_id)
+        return f"{base}.chunks", f"{base}.offsets", f"{base}.pages"
+
+    def refresh(self, folder_path: str) -> Tuple[MappedChunks, BM25Index]:
+        os.makedirs(self.index_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        previous = manifest["documents"]
+        documents: Dict[str, Dict] = {}
+        changed = False
+
+        stale: Dict[str, Tuple[str, os.stat_result]] = {}
+        for filename in sorted(os.listdir(folder_path)):
+            if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                continue
+            full_path = os.path.join(folder_path, filename)
+            key = os.path.abspath(full_path)
+            stat = os.stat(full_path)
+            entry = previous.get(key)
+            if (
+                entry
+                and entry["mtime"] == stat.st_mtime_ns
+                and entry["size"] == stat.st_size
+                and all(os.path.exists(p) for file_id in entry["files"] for p in self._paths(file_id))
+            ):
+                documents[key] = entry
+            else:
+                stale[key] = (filename, stat)
+
+        if stale:
+            changed = True
+            tasks = []
+            for key, (filename, stat) in stale.items():
+                for path, first_page, last_page in extraction_tasks([key]):
+                    file_id = hashlib.sha1(
+                        f"{key}|{stat.st_mtime_ns}|{stat.st_size}|{first_page}".encode("utf-8")
+                    ).hexdigest()
+                    base = os.path.join(self.index_dir, file_id)
+                    tasks.append((path, first_page, last_page, base, filename, self.chunk_size, self.overlap))
+            start = time.perf_counter()
+            results = run_extraction_tasks(_index_part, tasks, self.max_workers)
+            stats = extraction_stats(list(stale), tasks, results)
+            print_extraction_stats(stats, time.perf_counter() - start)
+            errors = {stat["file"]: stat["error"] for stat in stats}
+            for key, (filename, stat) in stale.items():
+                files = [os.path.basename(task[3]) for task in tasks if task[0] == key]
+                entry = {"name": filename, "mtime": stat.st_mtime_ns, "size": stat.st_size, "files": files}
+                if errors[key]:
+                    # Not retried until the file changes
+                    for file_id in files:
+                        for path in self._paths(file_id):
+                            _remove(path)
+                    entry["files"], entry["error"] = [], errors[key]
+                documents[key] = entry
+            # Keep the folder's (sorted) document order
+            documents = dict(sorted(documents.items(), key=lambda kv: kv[1]["name"]))
+
+        for key, entry in previous.items():
+            current = documents.get(key, {}).get("files", [])
+            if current != entry["files"]:
+                changed = True
+                for file_id in set(entry["files"]) - set(current):
+                    for path in self._paths(file_id):
+                        _remove(path)
+
+        chunks = MappedChunks()
+        for entry in documents.values():
+            for file_id in entry["files"]:
+                chunks.add_document(*self._paths(file_id), entry["name"])
+
+        index = None
+        if not changed:
+            try:
+                with open(self.search_index_path, "rb") as f:
+                    index = pickle.load(f)
+            except Exception:
+                index = None
+        if index is None:
+            index = BM25Index(chunks)
+            _atomic_write(self.search_index_path, pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL))
+
+        manifest["documents"] = documents
+        _atomic_write(self.manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+        self.changed = changed
+        return chunks, index
+
+    def load_vectors(self, chunks: MappedChunks, embedder) -> np.ndarray:
+        """
+        Chunk vectors for embedder, memory-mapped from vectors.npy. They are
+        re-embedded when documents changed since the last build or the
+        embedder is different; call after refresh().
+        """
+        meta_path = os.path.join(self.index_dir, "vectors.pkl")
+        vectors_path = os.path.join(self.index_dir, "vectors.npy")
+        if not self.changed:
+            try:
+                with open(meta_path, "rb") as f:
+                    meta = pickle.load(f)
+                if meta["signature"] == embedder.signature and meta["count"] == len(chunks):
+                    embedder.set_state(meta["state"])
+                    return np.load(vectors_path, mmap_mode="r")
+            except Exception:
+                pass
+        vectors = embed_chunks(embedder, chunks)
+        try:
+            with open(f"{vectors_path}.tmp", "wb") as f:
+                np.save(f, vectors)
+            os.replace(f"{vectors_path}.tmp", vectors_path)
+            meta = {"signature": embedder.signature, "count": len(chunks), "state": embedder.get_state()}
+            _atomic_write(meta_path, pickle.dumps(meta, protocol=pickle.HIGHEST_PROTOCOL))
+        except OSError as e:
+            # vectors.npy is still mapped by another KnowledgeBase (Windows)
+            print(f"[WARN] Could not persist KB vectors: {e}")
+        return vectors
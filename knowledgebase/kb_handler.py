@@ -1,22 +1,132 @@
-from utils.file_utils import extract_texts_from_folder
-from utils.text_utils import chunk_text, simple_search
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from config import KB_INDEX_DIR, KB_RETRIEVAL_MODE, KB_EMBEDDING_MODEL, KB_HYBRID_WEIGHT, KB_QUERY_CACHE_SIZE
+from knowledgebase.index_store import IndexStore, chunk_part
+from knowledgebase.vector_index import VectorIndex, embed_chunks, get_embedder, hybrid_search
+from utils.file_utils import (
+    SUPPORTED_EXTENSIONS,
+    extraction_stats,
+    extraction_tasks,
+    print_extraction_stats,
+    run_extraction_tasks,
+)
+from utils.text_utils import BM25Index, tokenize
 
 # folder_path: Path to the folder containing text files.
 # chunk_size: Maximum size of each text chunk (default 1000 characters).
 # overlap: Overlap size between chunks to maintain context (default 200 characters).
 # top_k: Number of top search results to return (default 3).
+# index_dir: Folder of the persistent index (None re-extracts every document on each load).
+# retrieval_mode: "keyword" (BM25), "semantic" (embedding similarity) or "hybrid" (both).
+# embedding_model: Local sentence-transformers model for semantic retrieval (None uses hashed TF-IDF vectors).
+# hybrid_weight: Share of the vector similarity in the hybrid score (the rest is BM25).
+# query_cache_size: Number of normalised queries whose results are kept (LRU); 0 disables the cache.
 
 class KnowledgeBase:
-    def __init__(self, folder_path, chunk_size=1000, overlap=200, top_k=3):
+    def __init__(self, folder_path, chunk_size=1000, overlap=200, top_k=3, index_dir=KB_INDEX_DIR,
+                 retrieval_mode=KB_RETRIEVAL_MODE, embedding_model=KB_EMBEDDING_MODEL,
+                 hybrid_weight=KB_HYBRID_WEIGHT, query_cache_size=KB_QUERY_CACHE_SIZE):
         self.folder_path = folder_path
         self.chunk_size = chunk_size
         self.chunk_overlap = overlap
         self.top_k = top_k
+        self.index_dir = index_dir
+        self.retrieval_mode = retrieval_mode
+        self.embedding_model = embedding_model
+        self.hybrid_weight = hybrid_weight
+        self.vector_index = None
+        self.query_cache_size = query_cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._query_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._load_kb()
+
+    def refresh(self):
+        """Pick up added, changed or removed documents."""
         self._load_kb()
 
     def _load_kb(self):
-        combined_text = extract_texts_from_folder(self.folder_path)
-        self.chunks = chunk_text(combined_text, self.chunk_size, self.chunk_overlap)
+        # Cached results refer to the chunk numbering of the previous index
+        with self._cache_lock:
+            self._query_cache.clear()
+        if self.index_dir:
+            store = IndexStore(self.index_dir, self.chunk_size, self.chunk_overlap)
+            self.chunks, self.index = store.refresh(self.folder_path)
+            self.source = self.chunks.source
+            if self.retrieval_mode != "keyword":
+                embedder = get_embedder(self.embedding_model)
+                self.vector_index = VectorIndex(embedder, store.load_vectors(self.chunks, embedder))
+            return
+        # Documents (or page ranges of large PDFs) are chunked on a process pool,
+        # each streamed page by page; chunks never span two documents.
+        filenames = [f for f in sorted(os.listdir(self.folder_path)) if f.lower().endswith(SUPPORTED_EXTENSIONS)]
+        paths = [os.path.join(self.folder_path, f) for f in filenames]
+        names = dict(zip(paths, filenames))
+        tasks = [
+            (path, first_page, last_page, names[path], self.chunk_size, self.chunk_overlap)
+            for path, first_page, last_page in extraction_tasks(paths)
+        ]
+        start = time.perf_counter()
+        results = run_extraction_tasks(chunk_part, tasks)
+        stats = extraction_stats(paths, tasks, results)
+        if stats:
+            print_extraction_stats(stats, time.perf_counter() - start)
+        failed = {stat["file"] for stat in stats if stat["error"]}
+        self.chunks, sources = [], []
+        for task, (doc_chunks, _, _, _) in zip(tasks, results):
+            if task[0] in failed:
+                continue
+            self.chunks.extend(chunk for chunk, _ in doc_chunks)
+            sources.extend((task[3], page) for _, page in doc_chunks)
+        self.source = sources.__getitem__
+        self.index = BM25Index(self.chunks)
+        if self.retrieval_mode != "keyword":
+            embedder = get_embedder(self.embedding_model)
+            self.vector_index = VectorIndex(embedder, embed_chunks(embedder, self.chunks))
+
+    def _top_indices(self, question: str) -> list[int]:
+        if not self.query_cache_size:
+            return self._search(question)
+        key = " ".join(tokenize(question))
+        with self._cache_lock:
+            hit = self._query_cache.get(key)
+            if hit is not None:
+                self._query_cache.move_to_end(key)
+                self.cache_hits += 1
+                return hit
+            self.cache_misses += 1
+        result = self._search(question)
+        with self._cache_lock:
+            self._query_cache[key] = result
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return result
+
+    def cache_stats(self) -> str:
+        lookups = self.cache_hits + self.cache_misses
+        rate = 100.0 * self.cache_hits / lookups if lookups else 0.0
+        return f"{self.cache_hits}/{lookups} KB queries served from cache ({rate:.1f}%)"
+
+    def _search(self, question: str) -> list[int]:
+        if self.retrieval_mode == "semantic":
+            hits = self.vector_index.search(question, self.top_k)
+        elif self.retrieval_mode == "hybrid":
+            hits = hybrid_search(self.index, self.vector_index, question, self.top_k, self.hybrid_weight)
+        else:
+            hits = self.index.search(question, self.top_k)
+        return [i for i, _ in hits] if hits else list(range(min(self.top_k, len(self.chunks))))
 
     def query(self, question: str) -> list[str]:
-        return simple_search(self.chunks, question, self.top_k)
+        return [self.chunks[i] for i in self._top_indices(question)]
+
+    def query_with_sources(self, question: str) -> list[dict]:
+        """Like query(), with the file name and page each chunk starts on, for citations."""
+        results = []
+        for i in self._top_indices(question):
+            source, page = self.source(i)
+            results.append({"text": self.chunks[i], "source": source, "page": page})
+        return results
@@ -0,0 +1,138 @@
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.text_utils import tokenize
+
+# Chunks are embedded this many at a time when the index is built.
+EMBED_BATCH_SIZE = 256
+
+
+class HashedTfidfEmbedder:
+    """
+    Offline fallback embedder: word and character 4-gram features hashed into
+    `dim` buckets, weighted by sublinear tf * idf and L2 normalised. The
+    character n-grams let "validate" and "validation" share most features.
+    """
+
+    def __init__(self, dim: int = 2048):
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+        self.signature = f"hashed-tfidf-{dim}"
+
+    def _features(self, text: str) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        for token in tokenize(text):
+            grams = [token] + [f"#{token}#"[i:i + 4] for i in range(max(len(token) - 1, 1))]
+            for gram in grams:
+                bucket = zlib.crc32(gram.encode("utf-8")) % self.dim
+                counts[bucket] = counts.get(bucket, 0) + 1
+        return counts
+
+    def fit(self, texts: Sequence[str]) -> None:
+        df = np.zeros(self.dim, dtype=np.float64)
+        for text in texts:
+            df[list(self._features(text))] += 1
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for bucket, tf in self._features(text).items():
+                matrix[row, bucket] = 1 + np.log(tf)
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def get_state(self) -> Dict:
+        return {"idf": self.idf}
+
+    def set_state(self, state: Dict) -> None:
+        self.idf = state["idf"]
+
+
+class SentenceTransformerEmbedder:
+    """Small local sentence-transformers model (e.g. all-MiniLM-L6-v2) run on the CPU."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.signature = f"sentence-transformers-{model_name}"
+
+    def fit(self, texts: Sequence[str]) -> None:
+        pass
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self.model.encode(list(texts), batch_size=64, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def get_state(self) -> Dict:
+        return {}
+
+    def set_state(self, state: Dict) -> None:
+        pass
+
+
+def get_embedder(model_name: Optional[str] = None):
+    """The local embedding model when one is configured and installed, else hashed TF-IDF."""
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except Exception as e:
+            print(f"[WARN] Embedding model {model_name} unavailable, using hashed TF-IDF vectors: {e}")
+    return HashedTfidfEmbedder()
+
+
+def embed_chunks(embedder, chunks: Sequence[str]) -> np.ndarray:
+    """Fit the embedder on the corpus and embed it in batches of EMBED_BATCH_SIZE chunks."""
+    embedder.fit(chunks)
+    batches = [
+        embedder.encode([chunks[j] for j in range(i, min(i + EMBED_BATCH_SIZE, len(chunks)))])
+        for i in range(0, len(chunks), EMBED_BATCH_SIZE)
+    ]
+    return np.vstack(batches) if batches else np.zeros((0, 1), dtype=np.float32)
+
+
+class VectorIndex:
+    """Cosine similarity search over a (chunks x dim) matrix of normalised vectors."""
+
+    def __init__(self, embedder, vectors: np.ndarray):
+        self.embedder = embedder
+        self.vectors = vectors
+
+    def scores(self, query: str) -> np.ndarray:
+        if not len(self.vectors):
+            return np.zeros(0, dtype=np.float32)
+        return self.vectors @ self.embedder.encode([query])[0]
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[int, float]]:
+        scores = self.scores(query)
+        return _top(scores, top_k)
+
+
+def _top(scores: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+    top_k = min(top_k, len(scores))
+    if top_k <= 0:
+        return []
+    best = np.argpartition(-scores, top_k - 1)[:top_k]
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return [(int(i), float(scores[i])) for i in best if scores[i] > 0]
+
+
+def hybrid_search(
+    keyword_index, vector_index: VectorIndex, query: str, top_k: int = 3, vector_weight: float = 0.5
+) -> List[Tuple[int, float]]:
+    """
+    Combine BM25 and cosine similarity: BM25 scores are scaled to [0, 1] by
+    the best keyword hit, then mixed with the vector scores by vector_weight.
+    """
+    combined = vector_weight * np.clip(vector_index.scores(query), 0, None)
+    keyword_hits = keyword_index.search(query, max(top_k * 10, 50))
+    if keyword_hits and len(combined):
+        best = keyword_hits[0][1] or 1.0
+        ids = np.fromiter((i for i, _ in keyword_hits), dtype=np.int64)
+        values = np.fromiter((s for _, s in keyword_hits), dtype=np.float32)
+        combined[ids] += (1 - vector_weight) * values / best
+    return _top(combined, top_k)
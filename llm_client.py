@@ -1,6 +1,47 @@
 # llm_client.py
+import threading
+from typing import Dict, Tuple
 from langchain_perplexity import ChatPerplexity
+from langchain_core.prompts import ChatPromptTemplate
 from config import PERPLEXITY_MODEL
 import streamlit as st
-PERPLEXITY_API_KEY = st.secrets["PERPLEXITY_API_KEY"]
-chat = ChatPerplexity(model=PERPLEXITY_MODEL, api_key=PERPLEXITY_API_KEY)
\ No newline at end of file
+
+# Shared, lazily created clients. Every ChatPerplexity keeps its own HTTP
+# connection pool, so reusing one instance per (model, temperature, key)
+# reuses the pooled connections across thousands of validations.
+_clients: Dict[Tuple, ChatPerplexity] = {}
+_prompt_templates: Dict[str, ChatPromptTemplate] = {}
+_lock = threading.Lock()
+
+
+def get_api_key() -> str:
+    return st.secrets["PERPLEXITY_API_KEY"]
+
+
+def get_chat(model: str = PERPLEXITY_MODEL, temperature: float = None, api_key: str = None) -> ChatPerplexity:
+    api_key = api_key or get_api_key()
+    key = (model, temperature, api_key)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            kwargs = {"model": model, "api_key": api_key}
+            if temperature is not None:
+                kwargs["temperature"] = temperature
+            client = _clients[key] = ChatPerplexity(**kwargs)
+        return client
+
+
+def get_prompt_template(template: str) -> ChatPromptTemplate:
+    """Compile a prompt template once and return the cached instance afterwards."""
+    with _lock:
+        prompt = _prompt_templates.get(template)
+        if prompt is None:
+            prompt = _prompt_templates[template] = ChatPromptTemplate.from_template(template)
+        return prompt
+
+
+def __getattr__(name: str):
+    # Keeps `from llm_client import chat` working without building the client at import time.
+    if name == "chat":
+        return get_chat()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,35 +1,43 @@
 import argparse
 import json as jsonlib
 from openapi.loader import load_openapi, pick_base_url
-from openapi.operations import collect_operations
+from openapi.operations import get_operations
 
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-from openapi.example_builder import synthesize_deep_example
-from tests.test_generation import (
-    recursively_generate_body_tests,
-    combine_unique_test_cases,
-    generate_body_field_boundary_tests,
-)
-from tests.executor import do_request
-from tests.reporter import write_csv
-from tests.header_tests import generate_header_tests_with_mandatory  # UPDATED import
-from tests.parameter_tests import generate_parameter_field_tests
-from tests.security_tests import generate_security_tests
-from tests.test_generation import generate_combinatorial_body_tests
-from tests.validator import llm_validate_response_with_kb
+from tests.pipeline import generate_test_variants
+from tests.test_generation import TestCaseIndex
+from tests.async_executor import execute_variants
+from tests.executor import open_session_pool, close_sessions
+from tests.reporter import StreamingReportWriter
+from tests.result_store import ResultStore
+from tests.validation_pipeline import ValidationPipeline
+from tests.rule_engine import variant_expected_status
+from tests.verdict_cache import VerdictCache
 from knowledgebase.kb_handler import KnowledgeBase
 import json
-import time
-from typing import Dict, Any, List
-from llm_client import chat
+from typing import Callable, Dict, Any, List, Optional
+from llm_client import get_chat
 from config import (
     OPENAPI_YAML_PATH,
     BASE_URL_OVERRIDE,
-    CSV_OUTPUT,
+    REPORT_OUTPUT,
     USE_LLM_VALIDATION,
-    KNOWLEDGE_FOLDER
+    KNOWLEDGE_FOLDER,
+    CONCURRENCY,
+    PER_HOST_CONCURRENCY,
+    HTTP_POOL_SIZE,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL_SECS,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_BATCH_SIZE,
+    LLM_CONCURRENCY,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_PROMPT_TOKEN_BUDGET,
+    REPORT_BODY_LIMIT,
+    RESULTS_DB_PATH,
+    RESULTS_DB_BATCH_SIZE,
 )
 import streamlit as st
 PERPLEXITY_API_KEY = st.secrets["PERPLEXITY_API_KEY"]
@@ -70,19 +78,28 @@ def extract_error_code_mapping(openapi_spec: Dict[str, Any]) -> Dict[str, str]:
 
 FILTER_FILE = None
 
-def run_api_tests(selected_operations: List[Dict] = None):
+def run_api_tests(
+    selected_operations: List[Dict] = None,
+    concurrency: int = CONCURRENCY,
+    resume: bool = False,
+    progress: Optional[Callable[[Dict], None]] = None,
+):
+    """
+    Run the tests of the selected operations (all by default). progress, if
+    given, is called with structured events: "start", "operation",
+    "executed", "result" (a final report row) and "done".
+    """
+    emit = progress or (lambda event: None)
     print("[INFO] Loading OpenAPI spec...")
     spec = load_openapi(OPENAPI_YAML_PATH)
 
-    with open(OPENAPI_YAML_PATH, "r", encoding="utf-8") as f:
-        spec_text = f.read()
-
     base_url = pick_base_url(spec, BASE_URL_OVERRIDE)
     print(f"[INFO] Base URL: {base_url}")
+    open_session_pool(base_url, max(HTTP_POOL_SIZE, concurrency))
 
     error_code_mapping = extract_error_code_mapping(spec)
 
-    all_operations = collect_operations(spec, base_url)
+    all_operations = get_operations(spec, base_url)
 
     if selected_operations is None and FILTER_FILE is not None:
         with open(FILTER_FILE, "r") as f:
@@ -91,124 +108,127 @@ def run_api_tests(selected_operations: List[Dict] = None):
 
     operations = selected_operations or all_operations
     print(f"[INFO] Operations selected for testing: {len(operations)}")
+    emit({"event": "start", "operations": len(operations)})
 
     kb = KnowledgeBase(KNOWLEDGE_FOLDER)
-    results = []
-    error_keywords = ["failed", "error", "validation error", "missing", "empty", "errorCd"]
-    mandatory_headers = [
-
-                         ]
-    for i, op in enumerate(operations, 1):
-        if not op.get("body") and op.get("requestBodySchema"):
-            op["body"] = synthesize_deep_example(op["requestBodySchema"])
-
-        recursive_body_tests = recursively_generate_body_tests(
-            op, op.get("body", {}), [], op.get("requestBodySchema", {})
-        )
-        boundary_tests = generate_body_field_boundary_tests(op, spec)
-        all_body_tests = combine_unique_test_cases(recursive_body_tests, boundary_tests)
-        header_tests = generate_header_tests_with_mandatory(op, spec, mandatory_headers)
-        parameter_tests_list = generate_parameter_field_tests(op, spec)
-        security_tests_list = generate_security_tests(op, spec)
-        combinatorial_tests = generate_combinatorial_body_tests(op, spec, max_comb=2)
-        test_variants = combine_unique_test_cases(
-            combine_unique_test_cases(
-                combine_unique_test_cases(
-                    combine_unique_test_cases(all_body_tests, header_tests),
-                    parameter_tests_list,
-                ),
-                security_tests_list,
-            ),
-            combinatorial_tests,
-        )
-
-        print(f"[INFO] Testing operation {i} with {len(test_variants)} test cases...")
-
-        for j, test_op in enumerate(test_variants, 1):
-            print(f"[EXEC] {i}.{j} {test_op['method']} {test_op['url']} : {test_op.get('description', '')}")
-            start_time = time.time()
-            status, body_text = do_request(test_op)
-            elapsed = round(time.time() - start_time, 3)
-            print(f"Response status: {status}")
-            print(f"Response body (truncated): {body_text[:500]}\n")
-
-            relevant_chunks = kb.query(test_op.get("description", "") or test_op["url"])
-
-            actual_error_text = ""
-            actual_response_json = None
-            try:
-                actual_response_json = json.loads(body_text)
-
-                # ✅ Handle dict or list for error text
-                if isinstance(actual_response_json, dict):
-                    actual_error_text = (
-                        actual_response_json.get("errorMsg")
-                        or actual_response_json.get("message")
-                        or ""
-                    )
-                elif isinstance(actual_response_json, list) and len(actual_response_json) > 0 and isinstance(actual_response_json[0], dict):
-                    actual_error_text = (
-                        actual_response_json[0].get("errorMsg")
-                        or actual_response_json[0].get("message")
-                        or ""
-                    )
-            except Exception:
-                actual_error_text = body_text if isinstance(body_text, str) else ""
-
-            is_error_response = any(kw in actual_error_text.lower() for kw in error_keywords)
-
-            desc = test_op.get("description", "").lower()
-            # if is_error_response or ("x-session-token" in desc or "token" in desc or "Invalid Token" in desc):
-            #     test_op["expected_status"] = 401
-            if is_error_response or ("missing" in desc or "blank" in desc or "invalid" in desc):
-                test_op["expected_status"] = 400
-            else:
-                test_op["expected_status"] = op.get("expected_status", 200)
-
-            expected_error_msg = ""
-            error_cd = None
-
-            # ✅ Handle dict or list for error code
-            if actual_response_json:
-                if isinstance(actual_response_json, dict):
-                    error_cd = actual_response_json.get("errorCd")
-                elif isinstance(actual_response_json, list) and len(actual_response_json) > 0 and isinstance(actual_response_json[0], dict):
-                    error_cd = actual_response_json[0].get("errorCd")
-
-            if error_cd and error_cd in error_code_mapping:
-                expected_error_msg = error_code_mapping[error_cd]
-            else:
-                expected_example_obj = test_op.get("expected_example")
-                if expected_example_obj:
-                    if isinstance(expected_example_obj, dict):
-                        expected_error_msg = (
-                            expected_example_obj.get("errorMsg")
-                            or expected_example_obj.get("message")
-                            or json.dumps(expected_example_obj)
-                        )
-                    else:
-                        expected_error_msg = str(expected_example_obj)
-
-                if not expected_error_msg and test_op.get("description"):
-                    expected_error_msg = test_op["description"]
-
-            if USE_LLM_VALIDATION:
-                verdict, notes = llm_validate_response_with_kb(
-                    spec_text,
-                    test_op,
-                    status,
-                    body_text,
-                    relevant_chunks,
-                    expected_error_msg,
-                    PERPLEXITY_API_KEY,
+    verdict_cache = VerdictCache(LLM_CACHE_PATH, LLM_CACHE_TTL_SECS, LLM_CACHE_MAX_ENTRIES)
+    report = StreamingReportWriter(REPORT_OUTPUT, body_limit=REPORT_BODY_LIMIT, resume=resume)
+    store = ResultStore(RESULTS_DB_PATH, batch_size=RESULTS_DB_BATCH_SIZE, body_limit=REPORT_BODY_LIMIT)
+    # Continue the latest run only when the report actually resumed; otherwise every
+    # result would be appended to a run that already finished
+    run_id = store.start_run(OPENAPI_YAML_PATH, base_url, resume=bool(report.completed_keys))
+
+    def on_complete(row):
+        report.complete(row)
+        store.add(row)
+        emit({"event": "result", "row": row})
+
+    validation = ValidationPipeline(
+        spec,
+        PERPLEXITY_API_KEY,
+        verdict_cache,
+        batch_size=LLM_BATCH_SIZE,
+        concurrency=LLM_CONCURRENCY,
+        requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+        error_code_mapping=error_code_mapping,
+        use_llm_validation=USE_LLM_VALIDATION,
+        token_budget=LLM_PROMPT_TOKEN_BUDGET,
+        on_complete=on_complete,
+    )
+    try:
+        handshake_total = transfer_total = 0.0
+        error_keywords = ["failed", "error", "validation error", "missing", "empty", "errorCd"]
+        mandatory_headers = [
+
+                             ]
+        variant_index = TestCaseIndex()
+        for i, op in enumerate(operations, 1):
+            test_variants = generate_test_variants(op, spec, mandatory_headers, max_comb=2, index=variant_index)
+            if report.completed_keys:
+                test_variants = (
+                    v for v in test_variants if TestCaseIndex.key_of(v) not in report.completed_keys
                 )
-            else:
-                verdict, notes = ("UNSURE", "LLM validation disabled or unavailable")
 
-            test_status = "PASS" if status == test_op.get("expected_status") else "FAIL"
-
-            results.append(
-                {
+            print(f"[INFO] Testing operation {i}: {op['method']} {op['path']}...")
+            emit({"event": "operation", "index": i, "method": op["method"], "path": op["path"]})
+
+            executed = execute_variants(test_variants, concurrency, PER_HOST_CONCURRENCY)
+            for j, (test_op, status, body_text, elapsed, timing) in enumerate(executed, 1):
+                print(f"[EXEC] {i}.{j} {test_op['method']} {test_op['url']} : {test_op.get('description', '')}")
+                print(f"Response status: {status}")
+                print(f"Response body (truncated): {body_text[:500]}\n")
+                emit({
+                    "event": "executed", "index": f"{i}.{j}", "method": test_op["method"], "url": test_op["url"],
+                    "description": test_op.get("description", ""), "status": status,
+                })
+
+                relevant_chunks = kb.query(test_op.get("description", "") or test_op["url"])
+
+                actual_error_text = ""
+                actual_response_json = None
+                try:
+                    actual_response_json = json.loads(body_text)
+
+                    # ✅ Handle dict or list for error text
+                    if isinstance(actual_response_json, dict):
+                        actual_error_text = (
+                            actual_response_json.get("errorMsg")
+                            or actual_response_json.get("message")
+                            or ""
+                        )
+                    elif isinstance(actual_response_json, list) and len(actual_response_json) > 0 and isinstance(actual_response_json[0], dict):
+                        actual_error_text = (
+                            actual_response_json[0].get("errorMsg")
+                            or actual_response_json[0].get("message")
+                            or ""
+                        )
+                except Exception:
+                    actual_error_text = body_text if isinstance(body_text, str) else ""
+
+                is_error_response = any(kw in actual_error_text.lower() for kw in error_keywords)
+
+                # Taken before expected_status is adjusted from the response below; only this
+                # expectation is trusted by the rule engine
+                rule_expected_status = variant_expected_status(test_op)
+
+                desc = test_op.get("description", "").lower()
+                # if is_error_response or ("x-session-token" in desc or "token" in desc or "Invalid Token" in desc):
+                #     test_op["expected_status"] = 401
+                if is_error_response or ("missing" in desc or "blank" in desc or "invalid" in desc):
+                    test_op["expected_status"] = 400
+                else:
+                    test_op["expected_status"] = op.get("expected_status", 200)
+
+                expected_error_msg = ""
+                error_cd = None
+
+                # ✅ Handle dict or list for error code
+                if actual_response_json:
+                    if isinstance(actual_response_json, dict):
+                        error_cd = actual_response_json.get("errorCd")
+                    elif isinstance(actual_response_json, list) and len(actual_response_json) > 0 and isinstance(actual_response_json[0], dict):
+                        error_cd = actual_response_json[0].get("errorCd")
+
+                if error_cd and error_cd in error_code_mapping:
+                    expected_error_msg = error_code_mapping[error_cd]
+                else:
+                    expected_example_obj = test_op.get("expected_example")
+                    if expected_example_obj:
+                        if isinstance(expected_example_obj, dict):
+                            expected_error_msg = (
+                                expected_example_obj.get("errorMsg")
+                                or expected_example_obj.get("message")
+                                or json.dumps(expected_example_obj)
+                            )
+                        else:
+                            expected_error_msg = str(expected_example_obj)
+
+                    if not expected_error_msg and test_op.get("description"):
+                        expected_error_msg = test_op["description"]
+
+                test_status = "PASS" if status == test_op.get("expected_status") else "FAIL"
+
+                row = {
                     "Description": test_op.get("description", ""),
                     "Endpoint": test_op["path"],
                     "Method": test_op["method"],
@@ -222,14 +242,43 @@ def run_api_tests(selected_operations: List[Dict] = None):
                     "ExpectedStatus": test_op.get("expected_status"),
                     "ExpectedResponseExample": json.dumps(test_op.get("expected_example") or {}, ensure_ascii=False),
                     "TestStatus": test_status,
-                    "LLMVerdict": verdict,
-                    "LLMNotes": notes,
+                    "LLMVerdict": "UNSURE",
+                    "LLMNotes": "LLM validation disabled or unavailable",
+                    "LLMCache": "",
+                    "VerdictSource": "",
+                    "PromptTokens": 0,
                     "ElapsedSecs": elapsed,
+                    "HandshakeSecs": timing["HandshakeSecs"],
+                    "TransferSecs": timing["TransferSecs"],
+                    "VariantKey": TestCaseIndex.key_of(test_op),
                 }
-            )
+                handshake_total += timing["HandshakeSecs"]
+                transfer_total += timing["TransferSecs"]
+                report.add(row)
+
+                validation.submit(
+                    row, test_op, status, body_text, relevant_chunks, expected_error_msg, rule_expected_status
+                )
 
-    write_csv(CSV_OUTPUT, results)
-    print(f"[DONE] Test report saved to: {CSV_OUTPUT}")
+            # Batches never span operations; they are validated in the background
+            validation.flush()
+            # Persist finished rows so the database keeps up with the report for --resume
+            store.flush()
+    finally:
+        # A failed run still releases its connections and keeps every finished row
+        close_sessions()
+        # Join the outstanding LLM verdicts into their rows before closing the report
+        validation.close()
+        report.close()
+        store.finish_run(validation.summary())
+        store.close()
+
+    print(f"[INFO] HTTP time: handshake {handshake_total:.3f}s, transfer {transfer_total:.3f}s")
+    print(f"[INFO] Validation: {validation.summary()}")
+    print(f"[INFO] Knowledge base: {kb.cache_stats()}")
+    print(f"[DONE] Test report saved to: {REPORT_OUTPUT} ({report.rows_written} new rows)")
+    print(f"[DONE] Results stored in {RESULTS_DB_PATH} (run {run_id})")
+    emit({"event": "done", "summary": validation.summary(), "report": REPORT_OUTPUT, "run_id": run_id})
 
 
 def list_apis(operations: List[Dict]) -> None:
@@ -276,7 +325,7 @@ def answer_using_kb_and_perplexity(query: str) -> str:
     # prompt = (
     #     "You are a helpful assistant. Use the following knowledge base information to answer the question.\n\n"
     #     f"Context:\n{'---\n'.join(relevant_chunks)}\n\nQuestion:\n{query}\n\nAnswer:")
-    response = chat.invoke(prompt)
+    response = get_chat().invoke(prompt)
     return response.content if hasattr(response, "content") else str(response)
 
 
@@ -300,13 +349,18 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--run-tests", action="store_true", help="Run API tests only")
     parser.add_argument("--filter-file", type=str, default=None, help="JSON file with list of API paths to run")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help="Maximum number of test requests in flight (1 runs sequentially)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Keep the existing report and skip tests it already contains")
     args = parser.parse_args()
 
     FILTER_FILE = args.filter_file
 
+    # Parsed once; run_api_tests gets the same spec and operations from the in-process cache
     spec = load_openapi(OPENAPI_YAML_PATH)
     base_url = pick_base_url(spec, BASE_URL_OVERRIDE)
-    operations = collect_operations(spec, base_url)
+    operations = get_operations(spec, base_url)
 
     # If filter file provided, load paths and filter operations list
     selected_operations = None
@@ -316,7 +370,8 @@ if __name__ == "__main__":
         selected_operations = [op for op in operations if op["path"] in filter_paths]
 
     if args.run_tests:
-        run_api_tests(selected_operations=selected_operations or operations)
+        run_api_tests(selected_operations=selected_operations or operations, concurrency=args.concurrency,
+                      resume=args.resume)
     else:
         while True:
             print("\nChoose an option:")
@@ -327,7 +382,7 @@ if __name__ == "__main__":
             choice = input("Enter choice number: ").strip()
 
             if choice == "1":
-                run_api_tests(selected_operations=operations)
+                run_api_tests(selected_operations=operations, concurrency=args.concurrency)
             elif choice == "2":
                 select_and_run_apis(operations)
             elif choice == "3":
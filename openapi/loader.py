@@ -1,10 +1,70 @@
+import hashlib
+import os
+import pickle
+import threading
 import yaml
 import re
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
-def load_openapi(path: str) -> Dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+from config import SPEC_CACHE_DIR
+
+# libyaml's C loader when PyYAML was built with it, else the pure-Python one
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# Part of the cache key; bump when the cached form changes.
+SPEC_CACHE_VERSION = 1
+
+# abs path -> ((mtime_ns, size), spec): specs already loaded in this process
+_loaded_specs: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+_lock = threading.Lock()
+
+
+def _read_cached_spec(cache_path: str) -> Optional[Dict]:
+    try:
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def _write_cached_spec(cache_path: str, spec: Dict) -> None:
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(f"{cache_path}.tmp", "wb") as f:
+            pickle.dump(spec, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{cache_path}.tmp", cache_path)
+    except OSError as e:
+        print(f"[WARN] Could not cache parsed spec: {e}")
+
+
+def load_openapi(path: str, cache_dir: Optional[str] = SPEC_CACHE_DIR) -> Dict:
+    """
+    Parse an OpenAPI YAML file. The parsed spec is kept in memory while the
+    file is unchanged, so every caller in the process shares one object
+    (treat it as read-only), and pickled to cache_dir under the hash of the
+    file contents so later processes skip YAML parsing entirely.
+    """
+    key = os.path.abspath(path)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        loaded = _loaded_specs.get(key)
+        if loaded and loaded[0] == version:
+            return loaded[1]
+
+        with open(path, "rb") as f:
+            data = f.read()
+        cache_path = None
+        spec = None
+        if cache_dir:
+            digest = hashlib.sha256(data + f"|v{SPEC_CACHE_VERSION}".encode("ascii")).hexdigest()
+            cache_path = os.path.join(cache_dir, f"{digest}.pkl")
+            spec = _read_cached_spec(cache_path)
+        if spec is None:
+            spec = yaml.load(data.decode("utf-8"), Loader=SafeLoader)
+            if cache_path:
+                _write_cached_spec(cache_path, spec)
+        _loaded_specs[key] = (version, spec)
+        return spec
 
 def pick_base_url(spec: Dict, override: str = None) -> str:
     if override:
@@ -1,6 +1,8 @@
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from openapi.loader import pick_base_url, clean_path
 from openapi.example_builder import synthesize_deep_example
+from openapi.schema_compiler import compile_spec
 # from config import legalEntityId, configId, txn, tenant_id, x_session_token, userId, scopeLevel, roleId, purposeId, \
 #     dataTypeId, businessId
 
@@ -20,8 +22,25 @@ def first_example_from_media(media_obj: Dict[str, Any]) -> Any:
         return schema["example"]
     return None
 
+# (spec, base_url, operations) of the latest call only, so an edited spec releases the previous one
+_operations_cache: Optional[Tuple[Dict[str, Any], str, List[Dict[str, Any]]]] = None
+_operations_lock = threading.Lock()
+
+
+def get_operations(spec: Dict[str, Any], base_url: str) -> List[Dict[str, Any]]:
+    """collect_operations, recomputed only when the spec object or base URL changes. Treat the result as read-only."""
+    global _operations_cache
+    with _operations_lock:
+        cached = _operations_cache
+        if cached is None or cached[0] is not spec or cached[1] != base_url:
+            cached = _operations_cache = (spec, base_url, collect_operations(spec, base_url))
+        return cached[2]
+
+
 def collect_operations(spec: Dict[str, Any], base_url: str) -> List[Dict[str, Any]]:
     operations = []
+    # $refs resolved and allOf flattened once per spec
+    compiled_spec = compile_spec(spec)
     paths = spec.get("paths", {})
     for raw_path, methods in paths.items():
         path = clean_path(raw_path)
@@ -30,16 +49,16 @@ def collect_operations(spec: Dict[str, Any], base_url: str) -> List[Dict[str, An
         for method, details in methods.items():
             if method.lower() not in ("get", "post", "put", "delete", "patch", "head", "options"):
                 continue
+            compiled = compiled_spec.operation(path, method)
 
             url = f"{base_url}{path}"
             headers = {}
 
             # Add header parameters from spec (may include dummy/example values)
-            for p in details.get("parameters", []) or []:
-                if p.get("in") == "header":
-                    name = p.get("name")
-                    example = p.get("schema", {}).get("example", "string")
-                    headers[name] = example
+            for p in compiled.parameters_in("header"):
+                name = p.get("name")
+                example = (p.get("schema") or {}).get("example", "string")
+                headers[name] = example
 
             # Headers from config always overwrite or add
             # if x_session_token:
@@ -78,16 +97,15 @@ def collect_operations(spec: Dict[str, Any], base_url: str) -> List[Dict[str, An
 
             # Content-Type & body
             schema = None
-            if details.get("requestBody"):
+            if compiled.request_body:
                 headers.setdefault("Content-Type", "application/json")
-                rb_content = details.get("requestBody", {}).get("content", {}).get("application/json", {})
-                schema = rb_content.get("schema", {})
+                schema = compiled.request_schema
                 body = synthesize_deep_example(schema)
             else:
                 body = None
 
             # Extract expected response example and status with prioritized codes
-            responses = details.get("responses", {}) or {}
+            responses = compiled.responses
             expected_status = None
 
             # Prioritize success codes (200-series)
@@ -120,7 +138,7 @@ def collect_operations(spec: Dict[str, Any], base_url: str) -> List[Dict[str, An
                 "path": path,
                 "headers": headers,
                 "body": body,
-                "requestBodySchema": schema if details.get("requestBody") else None,
+                "requestBodySchema": schema if compiled.request_body else None,
                 "responses": responses,
                 "expected_status": int(expected_status) if expected_status else None,
                 "expected_example": expected_example,
@@ -0,0 +1,219 @@
+import threading
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from openapi.loader import clean_path
+
+HTTP_METHODS = ("get", "post", "put", "delete", "patch", "head", "options")
+# Path element standing for every item of an array in a FieldDescriptor path
+ARRAY_ITEM = "*"
+
+
+def resolve_pointer(spec: Dict, ref: str) -> Any:
+    """Target of a local JSON pointer such as '#/components/schemas/Object', or None."""
+    node = spec
+    for part in ref[2:].split("/"):
+        part = part.replace("~1", "/").replace("~0", "~")
+        if not isinstance(node, dict) or part not in node:
+            return None
+        node = node[part]
+    return node
+
+
+def _merge_all_of(parts: List[Any]) -> Dict:
+    """Flatten resolved allOf parts: properties are merged, required lists joined, other keys last-wins."""
+    merged: Dict[str, Any] = {}
+    for part in parts:
+        if not isinstance(part, dict):
+            continue
+        for key, value in part.items():
+            if key == "properties" and isinstance(value, dict):
+                merged["properties"] = {**merged.get("properties", {}), **value}
+            elif key == "required" and isinstance(value, list):
+                merged["required"] = list(dict.fromkeys(merged.get("required", []) + value))
+            else:
+                merged[key] = value
+    if "properties" in merged:
+        merged.setdefault("type", "object")
+    return merged
+
+
+class SchemaResolver:
+    """
+    Resolves local $refs and flattens allOf. Each referenced component is
+    resolved once and shared by every schema that uses it. A $ref met again
+    while it is still being resolved (a recursive schema) is left as
+    {"x-circular-ref": ref} instead of being expanded. Sub-trees without
+    $ref or allOf are returned as they are, so resolved schemas share most
+    of their nodes with the spec and must be treated as read-only.
+    """
+
+    def __init__(self, spec: Dict):
+        self.spec = spec
+        self._refs: Dict[str, Any] = {}
+        self._resolving: set = set()
+
+    def resolve_ref(self, ref: str) -> Any:
+        if ref in self._refs:
+            return self._refs[ref]
+        if ref in self._resolving or not ref.startswith("#/"):
+            return {"x-circular-ref": ref}
+        self._resolving.add(ref)
+        try:
+            resolved = self.resolve(resolve_pointer(self.spec, ref))
+        finally:
+            self._resolving.discard(ref)
+        self._refs[ref] = resolved
+        return resolved
+
+    def resolve(self, node: Any) -> Any:
+        if isinstance(node, list):
+            items = [self.resolve(v) for v in node]
+            return node if all(a is b for a, b in zip(items, node)) else items
+        if not isinstance(node, dict):
+            return node
+
+        ref = node.get("$ref")
+        if isinstance(ref, str):
+            target = self.resolve_ref(ref)
+            siblings = {k: self.resolve(v) for k, v in node.items() if k != "$ref"}
+            return {**target, **siblings} if siblings and isinstance(target, dict) else target
+
+        resolved = {k: self.resolve(v) for k, v in node.items()}
+        if isinstance(resolved.get("allOf"), list):
+            parts = resolved.pop("allOf")
+            return _merge_all_of(parts + [resolved])
+        return node if all(resolved[k] is node[k] for k in node) else resolved
+
+
+class FieldDescriptor(NamedTuple):
+    """One request body field: its path from the body root and the constraints tests are derived from."""
+    path: Tuple[str, ...]
+    type: Optional[str]
+    required: bool
+    enum: Optional[List[Any]]
+    minimum: Any
+    maximum: Any
+    min_length: Optional[int]
+    max_length: Optional[int]
+
+
+def _index_fields(schema: Dict, prefix: Tuple[str, ...], fields: List[FieldDescriptor]) -> None:
+    properties = schema.get("properties", {}) or {}
+    required = schema.get("required", []) or []
+    for name, field_schema in properties.items():
+        if not isinstance(field_schema, dict):
+            continue
+        path = prefix + (name,)
+        enum = field_schema.get("enum")
+        fields.append(FieldDescriptor(
+            path,
+            field_schema.get("type"),
+            name in required,
+            enum if isinstance(enum, list) else None,
+            field_schema.get("minimum"),
+            field_schema.get("maximum"),
+            field_schema.get("minLength"),
+            field_schema.get("maxLength"),
+        ))
+        if field_schema.get("type") == "object":
+            _index_fields(field_schema, path, fields)
+        elif field_schema.get("type") == "array":
+            items = field_schema.get("items") or {}
+            if isinstance(items, dict) and items.get("type") == "object":
+                _index_fields(items, path + (ARRAY_ITEM,), fields)
+
+
+def build_field_index(schema: Dict) -> List[FieldDescriptor]:
+    """
+    Flatten a resolved body schema into its fields, parents before children,
+    in property order. Items of arrays of objects appear under ARRAY_ITEM.
+    """
+    fields: List[FieldDescriptor] = []
+    if isinstance(schema, dict):
+        _index_fields(schema, (), fields)
+    return fields
+
+
+class CompiledOperation:
+    """
+    One operation of the spec with every $ref resolved: merged path- and
+    operation-level parameters, the JSON request body schema with its
+    top-level properties and required set, and the responses.
+    """
+
+    def __init__(self, path: str, method: str, details: Dict = None, path_item: Dict = None,
+                 resolver: SchemaResolver = None):
+        details = details or {}
+        path_item = path_item or {}
+        resolve = resolver.resolve if resolver else (lambda node: node)
+        self.path = clean_path(path)
+        self.method = method.upper()
+        self.details = details
+
+        # Operation-level parameters override path-level ones with the same name and location
+        parameters: Dict[Tuple[Any, Any], Dict] = {}
+        for param in (path_item.get("parameters") or []) + (details.get("parameters") or []):
+            param = resolve(param)
+            if isinstance(param, dict):
+                parameters[(param.get("name"), param.get("in"))] = param
+        self.parameters: List[Dict] = list(parameters.values())
+
+        self.request_body: Optional[Dict] = resolve(details.get("requestBody")) or None
+        media = ((self.request_body or {}).get("content") or {}).get("application/json") or {}
+        schema = media.get("schema") if isinstance(media, dict) else None
+        self.request_schema: Dict = schema if isinstance(schema, dict) else {}
+        self.properties: Dict[str, Dict] = self.request_schema.get("properties", {}) or {}
+        self.required = set(self.request_schema.get("required", []) or [])
+        self.fields: List[FieldDescriptor] = build_field_index(self.request_schema)
+        self.top_level_fields: List[FieldDescriptor] = [f for f in self.fields if len(f.path) == 1]
+        self.responses: Dict = resolve(details.get("responses", {})) or {}
+        self.security = details.get("security")
+
+    def parameters_in(self, *locations: str) -> List[Dict]:
+        return [p for p in self.parameters if p.get("in") in locations]
+
+
+class CompiledSpec:
+    """Every operation of a spec, compiled once, in spec order and by (clean path, method)."""
+
+    def __init__(self, spec: Dict):
+        self.spec = spec
+        self.resolver = SchemaResolver(spec)
+        self.operations: List[CompiledOperation] = []
+        self._by_key: Dict[Tuple[str, str], CompiledOperation] = {}
+        for raw_path, path_item in (spec.get("paths", {}) or {}).items():
+            if not isinstance(path_item, dict):
+                continue
+            for method, details in path_item.items():
+                if method.lower() not in HTTP_METHODS or not isinstance(details, dict):
+                    continue
+                compiled = CompiledOperation(raw_path, method, details, path_item, self.resolver)
+                self.operations.append(compiled)
+                self._by_key.setdefault((compiled.path, compiled.method), compiled)
+
+    def __iter__(self) -> Iterator[CompiledOperation]:
+        return iter(self.operations)
+
+    def operation(self, path: str, method: str) -> CompiledOperation:
+        """The compiled operation, or an empty one when the spec does not define it."""
+        compiled = self._by_key.get((clean_path(path), method.upper()))
+        return compiled if compiled is not None else CompiledOperation(path, method)
+
+
+# Only the latest spec is kept compiled, so an edited spec releases the previous one
+_compiled_spec: Optional[CompiledSpec] = None
+_lock = threading.Lock()
+
+
+def compile_spec(spec: Dict) -> CompiledSpec:
+    """The compiled form of spec, rebuilt only when a different spec object is passed (see openapi.loader.load_openapi)."""
+    global _compiled_spec
+    with _lock:
+        if _compiled_spec is None or _compiled_spec.spec is not spec:
+            _compiled_spec = CompiledSpec(spec)
+        return _compiled_spec
+
+
+def compiled_operation(spec: Dict, op: Dict) -> CompiledOperation:
+    """Compiled spec entry of a collected operation (or test variant)."""
+    return compile_spec(spec).operation(op["path"], op["method"])
@@ -0,0 +1,111 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+from tests.executor import do_request_timed
+
+_DONE = object()
+
+
+def _timed_request(op: Dict) -> Tuple[int, str, float, Dict[str, float]]:
+    # Timing is taken inside the worker so queueing behind the concurrency
+    # limits never leaks into ElapsedSecs.
+    start_time = time.time()
+    status, body_text, timing = do_request_timed(op)
+    return status, body_text, round(time.time() - start_time, 3), timing
+
+
+async def _run_async(
+    variants: Iterable[Dict],
+    concurrency: int,
+    per_host_limit: Optional[int],
+    emit,
+) -> None:
+    loop = asyncio.get_running_loop()
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="api-exec") as pool:
+
+        async def run_one(op: Dict) -> Tuple[int, str, float, Dict[str, float]]:
+            host = urlsplit(op["url"]).netloc
+            sem = host_limits.get(host)
+            if sem is None:
+                sem = host_limits[host] = asyncio.Semaphore(per_host_limit or concurrency)
+            async with sem:
+                return await loop.run_in_executor(pool, _timed_request, op)
+
+        # Keep a bounded window of scheduled requests and hand results back
+        # in submission order so report rows keep their original sequence.
+        pending = deque()
+        variant_iter = iter(variants)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < concurrency * 2:
+                try:
+                    op = next(variant_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.append((op, asyncio.ensure_future(run_one(op))))
+            if not pending:
+                break
+            op, task = pending.popleft()
+            result = await task
+            if not await loop.run_in_executor(None, emit, (op, *result)):
+                for _, other in pending:
+                    other.cancel()
+                return
+
+
+def execute_variants(
+    variants: Iterable[Dict],
+    concurrency: int = 1,
+    per_host_limit: Optional[int] = None,
+) -> Iterator[Tuple[Dict, int, str, float, Dict[str, float]]]:
+    """
+    Execute test variants and yield (test_op, status, body_text, elapsed, timing) in input order.
+    concurrency: maximum number of requests in flight; 1 keeps the sequential path.
+    per_host_limit: maximum number of requests in flight against a single host; None means concurrency.
+    """
+    if concurrency <= 1:
+        for op in variants:
+            yield (op, *_timed_request(op))
+        return
+
+    results: "queue.Queue" = queue.Queue(maxsize=concurrency * 2)
+    stopped = threading.Event()
+
+    def emit(item) -> bool:
+        while not stopped.is_set():
+            try:
+                results.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker() -> None:
+        try:
+            asyncio.run(_run_async(variants, concurrency, per_host_limit, emit))
+        except BaseException as e:
+            emit(e)
+        emit(_DONE)
+
+    thread = threading.Thread(target=worker, name="api-exec-loop", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+        thread.join(timeout=5)
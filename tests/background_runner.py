@@ -0,0 +1,122 @@
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Callable, Deque, Dict
+
+
+class BackgroundRunner:
+    """
+    Runs a test run function (run_api_tests) in a daemon thread. The function
+    reports progress events through its `progress` callback, which folds
+    them, in the worker thread, into a ring buffer of the last `log_lines`
+    log lines and done/pass/fail counters. Nothing else of an event is kept,
+    so memory and rendering cost stay the same however long the run is and
+    whether or not anyone polls. poll() returns a consistent snapshot.
+    """
+
+    def __init__(self, target: Callable, log_lines: int = 500):
+        self.target = target
+        self.lines: Deque[str] = deque(maxlen=log_lines)
+        self.operations = 0
+        self.operations_done = 0
+        self.done = 0
+        self.passed = 0
+        self.failed = 0
+        self.error = None
+        self.summary = ""
+        self.started_at = None
+        self.finished_at = None
+        self._finish_reported = False
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        # Ends with the "finished" event rather than the thread, so a UI refreshed on it sees the run as over
+        return self._thread is not None and self.finished_at is None
+
+    def start(self, **kwargs) -> None:
+        if self.running:
+            raise RuntimeError("A test run is already in progress")
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, kwargs=kwargs, daemon=True)
+        self._thread.start()
+
+    def _run(self, **kwargs) -> None:
+        try:
+            self.target(progress=self._on_event, **kwargs)
+        except Exception as e:
+            self._on_event({"event": "error", "error": f"{e}\n{traceback.format_exc()}"})
+        finally:
+            self._on_event({"event": "finished"})
+
+    def _on_event(self, event: Dict) -> None:
+        with self._lock:
+            self._apply(event)
+
+    def poll(self) -> Dict[str, Any]:
+        """
+        Snapshot of the counters and log lines. "finished" is True on the
+        first poll after the run ended, so the caller can refresh once.
+        """
+        with self._lock:
+            finished = self.finished_at is not None and not self._finish_reported
+            self._finish_reported = self.finished_at is not None
+            return {
+                "started": self.started_at is not None,
+                "running": self.started_at is not None and self.finished_at is None,
+                "finished": finished,
+                "operations": self.operations,
+                "operations_done": self.operations_done,
+                "done": self.done,
+                "passed": self.passed,
+                "failed": self.failed,
+                "throughput": self.throughput,
+                "error": self.error,
+                "summary": self.summary,
+                "lines": list(self.lines),
+            }
+
+    def _apply(self, event: Dict) -> None:
+        kind = event["event"]
+        if kind == "start":
+            self.operations = event["operations"]
+            self.lines.append(f"[INFO] Operations selected for testing: {event['operations']}")
+        elif kind == "operation":
+            self.operations_done = event["index"] - 1
+            self.lines.append(f"[INFO] Testing operation {event['index']}: {event['method']} {event['path']}...")
+        elif kind == "executed":
+            self.lines.append(f"[EXEC] {event['index']} {event['method']} {event['url']} : {event['description']}")
+            self.lines.append(f"Response status: {event['status']}")
+        elif kind == "result":
+            row = event["row"]
+            self.done += 1
+            if row.get("TestStatus") == "PASS":
+                self.passed += 1
+            else:
+                self.failed += 1
+            self.lines.append(
+                f"[{row.get('TestStatus')}] {row.get('Method')} {row.get('Endpoint')} : {row.get('Description')} "
+                f"(expected {row.get('ExpectedStatus')}, got {row.get('ActualStatus')}, LLM {row.get('LLMVerdict')})"
+            )
+        elif kind == "done":
+            self.operations_done = self.operations
+            self.summary = event["summary"]
+            self.lines.append(f"[DONE] Test report saved to: {event['report']} (run {event['run_id']})")
+        elif kind == "error":
+            self.error = event["error"]
+            self.lines.append(f"[ERROR] Test run failed: {event['error'].splitlines()[0]}")
+        elif kind == "finished":
+            self.finished_at = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Completed tests per second."""
+        return self.done / self.elapsed if self.elapsed else 0.0
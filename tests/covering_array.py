@@ -0,0 +1,58 @@
+import random
+from itertools import combinations, product
+from typing import Iterator, List, Optional, Tuple
+
+
+def covering_array(
+    num_factors: int,
+    num_levels: int,
+    strength: int = 2,
+    seed: int = 0,
+    max_rows: Optional[int] = None,
+    candidates: int = 20,
+) -> Iterator[Tuple[int, ...]]:
+    """
+    Greedily build a t-way covering array and yield its rows one at a time.
+
+    Every combination of `strength` factors sees every combination of levels
+    in at least one row, so all t-field interactions are exercised with a
+    small fraction of the exhaustive product. Each row fixes one uncovered
+    t-tuple, fills the remaining factors at random and keeps the best of
+    `candidates` such rows. The seed makes the output reproducible.
+    max_rows: stop early once this many rows have been produced (coverage may be partial).
+    """
+    if num_factors <= 0 or num_levels <= 0:
+        return
+    t = max(1, min(strength, num_factors))
+    rng = random.Random(seed)
+    factor_combos = list(combinations(range(num_factors), t))
+    uncovered = {
+        (combo, levels)
+        for combo in factor_combos
+        for levels in product(range(num_levels), repeat=t)
+    }
+
+    # Scoring a candidate touches every factor combination, so large t-way
+    # arrays try fewer candidates per row to keep generation time bounded.
+    candidates = max(1, min(candidates, 50000 // len(factor_combos)))
+    # Sorting keeps the random choices independent of set iteration order.
+    pool: List = sorted(uncovered)
+    rows = 0
+    while uncovered and (max_rows is None or rows < max_rows):
+        if len(uncovered) * 4 < len(pool):
+            pool = sorted(uncovered)
+        best_row, best_gain = None, -1
+        for _ in range(candidates):
+            combo, levels = rng.choice(pool)
+            while (combo, levels) not in uncovered:
+                combo, levels = rng.choice(pool)
+            row = [rng.randrange(num_levels) for _ in range(num_factors)]
+            for factor, level in zip(combo, levels):
+                row[factor] = level
+            gain = sum(1 for c in factor_combos if (c, tuple(row[i] for i in c)) in uncovered)
+            if gain > best_gain:
+                best_row, best_gain = row, gain
+        for c in factor_combos:
+            uncovered.discard((c, tuple(best_row[i] for i in c)))
+        rows += 1
+        yield tuple(best_row)
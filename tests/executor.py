@@ -1,21 +1,131 @@
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib.parse import urlsplit
 from typing import Tuple, Dict
 
 REQUEST_TIMEOUT_SECS = 30
 VERIFY_SSL = False
+POOL_SIZE = 10
 
-def do_request(op: Dict) -> Tuple[int, str]:
+# Seconds spent in connect() (TCP + TLS handshake) by the current thread's request.
+_timing = threading.local()
+
+# scheme://netloc -> session
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _record_handshake(start: float) -> None:
+    _timing.handshake_secs = getattr(_timing, "handshake_secs", 0.0) + time.perf_counter() - start
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_handshake(start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_handshake(start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+def open_session_pool(base_url: str, pool_size: int = POOL_SIZE) -> requests.Session:
+    """
+    Return the keep-alive session for the scheme and host of base_url,
+    creating it with a connection pool of pool_size connections on first use.
+    """
+    key = _origin(base_url)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = _PooledAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+        return session
+
+
+def _session_for(url: str) -> requests.Session:
+    # Matched on scheme and netloc: a prefix test would send http://host:8080
+    # through the session of http://host:80
+    session = _sessions.get(_origin(url))
+    return session if session is not None else open_session_pool(url)
+
+
+def close_sessions() -> None:
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def do_request_timed(op: Dict) -> Tuple[int, str, Dict[str, float]]:
+    """
+    Send the request for op over the pooled session of its base URL.
+    Returns (status, body_text, timing) where timing splits the wall time into
+    HandshakeSecs (new TCP/TLS connections) and TransferSecs (everything else).
+    """
     method = op["method"]
     url = op["url"]
     headers = op.get("headers", {})
     body = op.get("body", None)
+    _timing.handshake_secs = 0.0
+    start = time.perf_counter()
     try:
+        session = _session_for(url)
         if method == "GET":
-            r = requests.get(url, headers=headers, params=body if isinstance(body, dict) else None,
-                             timeout=REQUEST_TIMEOUT_SECS, verify=VERIFY_SSL)
+            r = session.get(url, headers=headers, params=body if isinstance(body, dict) else None,
+                            timeout=REQUEST_TIMEOUT_SECS, verify=VERIFY_SSL)
         else:
-            r = requests.request(method, url, headers=headers, json=body,
+            r = session.request(method, url, headers=headers, json=body,
                                 timeout=REQUEST_TIMEOUT_SECS, verify=VERIFY_SSL)
-        return r.status_code, r.text
+        status, text = r.status_code, r.text
     except Exception as e:
-        return -1, f"REQUEST_ERROR: {e}"
+        status, text = -1, f"REQUEST_ERROR: {e}"
+    total = time.perf_counter() - start
+    handshake = min(_timing.handshake_secs, total)
+    timing = {
+        "HandshakeSecs": round(handshake, 3),
+        "TransferSecs": round(total - handshake, 3),
+    }
+    return status, text, timing
+
+
+def do_request(op: Dict) -> Tuple[int, str]:
+    status, text, _ = do_request_timed(op)
+    return status, text
@@ -0,0 +1,54 @@
+from typing import Dict, Iterator, List
+
+from config import (
+    COMBINATORIAL_STRATEGY,
+    COMBINATORIAL_STRENGTH,
+    COMBINATORIAL_BUDGET,
+    COMBINATORIAL_SEED,
+)
+from openapi.example_builder import synthesize_deep_example
+from tests.test_generation import (
+    recursively_generate_body_tests,
+    generate_body_field_boundary_tests,
+    generate_combinatorial_body_tests,
+    iter_unique_test_cases,
+    TestCaseIndex,
+)
+from tests.header_tests import generate_header_tests_with_mandatory
+from tests.parameter_tests import generate_parameter_field_tests
+from tests.security_tests import generate_security_tests
+
+
+def generate_test_variants(
+    op: Dict,
+    spec: Dict,
+    mandatory_headers: List[str],
+    max_comb: int = 2,
+    index: TestCaseIndex = None,
+) -> Iterator[Dict]:
+    """
+    Stream every test variant for one operation, de-duplicated on the fly.
+    Each generator is only advanced when the previous one is exhausted, so the
+    first variant can be executed before the later ones have been produced.
+    index: de-duplication index to share across operations (a fresh one per call by default).
+    """
+    if not op.get("body") and op.get("requestBodySchema"):
+        op["body"] = synthesize_deep_example(op["requestBodySchema"])
+
+    yield from iter_unique_test_cases(
+        recursively_generate_body_tests(op, op.get("body", {}), [], op.get("requestBodySchema", {})),
+        generate_body_field_boundary_tests(op, spec),
+        generate_header_tests_with_mandatory(op, spec, mandatory_headers),
+        generate_parameter_field_tests(op, spec),
+        generate_security_tests(op, spec),
+        generate_combinatorial_body_tests(
+            op,
+            spec,
+            max_comb=max_comb,
+            strategy=COMBINATORIAL_STRATEGY,
+            strength=COMBINATORIAL_STRENGTH,
+            budget=COMBINATORIAL_BUDGET,
+            seed=COMBINATORIAL_SEED,
+        ),
+        index=index,
+    )
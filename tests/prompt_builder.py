@@ -0,0 +1,153 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from openapi.loader import clean_path
+from openapi.schema_compiler import resolve_pointer
+
+# Rough average for English text and JSON with the model's tokenizer.
+CHARS_PER_TOKEN = 4
+# Response fields that are never shortened when a body is truncated.
+ERROR_FIELDS = ("errorCd", "errorMsg", "message", "error", "code", "status", "detail")
+_TRUNCATED = "...(truncated)"
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _collect_refs(node: Any, refs: List[str]) -> None:
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if isinstance(ref, str) and ref.startswith("#/") and ref not in refs:
+            refs.append(ref)
+        for v in node.values():
+            _collect_refs(v, refs)
+    elif isinstance(node, list):
+        for v in node:
+            _collect_refs(v, refs)
+
+
+def extract_operation_spec(spec: Dict, path: str, method: str, include_components: bool = True) -> str:
+    """
+    Return the YAML fragment of the spec for one operation, plus the
+    components it references (transitively) when include_components is set.
+    """
+    paths = spec.get("paths", {}) or {}
+    raw_path = next((p for p in paths if clean_path(p) == path), path)
+    details = (paths.get(raw_path) or {}).get(method.lower())
+    if not isinstance(details, dict):
+        return ""
+    fragment: Dict[str, Any] = {"paths": {raw_path: {method.lower(): details}}}
+
+    if include_components:
+        refs: List[str] = []
+        _collect_refs(details, refs)
+        components: Dict[str, Any] = {}
+        i = 0
+        while i < len(refs):
+            target = resolve_pointer(spec, refs[i])
+            parts = refs[i][2:].split("/")
+            if target is not None and len(parts) == 3 and parts[0] == "components":
+                components.setdefault(parts[1], {})[parts[2]] = target
+                _collect_refs(target, refs)
+            i += 1
+        if components:
+            fragment["components"] = components
+
+    return yaml.safe_dump(fragment, sort_keys=False, allow_unicode=True)
+
+
+def _shrink(value: Any, str_limit: int, list_limit: int) -> Any:
+    if isinstance(value, dict):
+        return {
+            k: v if k in ERROR_FIELDS and not isinstance(v, (dict, list)) else _shrink(v, str_limit, list_limit)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        shrunk = [_shrink(v, str_limit, list_limit) for v in value[:list_limit]]
+        if len(value) > list_limit:
+            shrunk.append(f"...({len(value) - list_limit} more items)")
+        return shrunk
+    if isinstance(value, str) and len(value) > str_limit:
+        return value[:str_limit] + _TRUNCATED
+    return value
+
+
+def truncate_response_body(body_text: str, max_tokens: int) -> str:
+    """
+    Fit a response body into max_tokens. JSON bodies are shortened structurally:
+    every key and every error field is kept while long strings and lists are cut.
+    """
+    body_text = body_text if isinstance(body_text, str) else str(body_text)
+    max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(body_text) <= max_chars:
+        return body_text
+    try:
+        data = json.loads(body_text)
+    except Exception:
+        return body_text[:max_chars] + _TRUNCATED
+    text = body_text
+    for str_limit, list_limit in ((200, 5), (80, 3), (40, 1), (16, 1)):
+        text = json.dumps(_shrink(data, str_limit, list_limit), ensure_ascii=False)
+        if len(text) <= max_chars:
+            return text
+    return text[:max_chars] + _TRUNCATED
+
+
+def _terms(text: str) -> set:
+    return {t for t in re.findall(r"[a-z0-9_]+", (text or "").lower()) if len(t) > 2}
+
+
+def rank_kb_chunks(chunks: List[str], query: str, max_tokens: int) -> List[str]:
+    """Keep the chunks sharing the most terms with query that fit into max_tokens."""
+    query_terms = _terms(query)
+    ranked = sorted(
+        enumerate(chunks),
+        key=lambda ic: (-len(query_terms & _terms(ic[1])), ic[0]),
+    )
+    selected, used = [], 0
+    for _, chunk in ranked:
+        cost = estimate_tokens(chunk)
+        if used + cost > max_tokens:
+            if not selected and max_tokens > 0:
+                selected.append(chunk[: max_tokens * CHARS_PER_TOKEN])
+            continue
+        selected.append(chunk)
+        used += cost
+    return selected
+
+
+def fit_prompt_parts(
+    spec_fragment: str,
+    response_bodies: List[str],
+    kb_chunks: List[str],
+    query: str,
+    token_budget: int,
+    fixed_tokens: int = 0,
+    spec_share: float = 0.35,
+    response_share: float = 0.35,
+    spec_fragment_without_components: Optional[str] = None,
+) -> Tuple[str, List[str], List[str]]:
+    """
+    Split the tokens left after fixed_tokens (instructions, request data)
+    between the spec fragment, the response bodies (shared equally) and the
+    KB chunks, which get whatever the other two leave unused.
+    """
+    available = max(token_budget - fixed_tokens, 0)
+
+    spec_allowance = int(available * spec_share)
+    spec_text = spec_fragment
+    if estimate_tokens(spec_text) > spec_allowance and spec_fragment_without_components is not None:
+        spec_text = spec_fragment_without_components
+    if estimate_tokens(spec_text) > spec_allowance:
+        spec_text = spec_text[: spec_allowance * CHARS_PER_TOKEN] + _TRUNCATED
+
+    per_body = int(available * response_share) // max(len(response_bodies), 1)
+    bodies = [truncate_response_body(b, per_body) for b in response_bodies]
+
+    kb_allowance = available - estimate_tokens(spec_text) - sum(estimate_tokens(b) for b in bodies)
+    chunks = rank_kb_chunks(kb_chunks, query, max(kb_allowance, 0))
+    return spec_text, bodies, chunks
@@ -1,5 +1,32 @@
 import csv
-from typing import List, Dict
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Set
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Columns of the test report, in order.
+REPORT_FIELDS = [
+    "Description", "Endpoint", "Method", "URL", "RequestHeaders", "RequestBody",
+    "ActualStatus", "ActualResponseSnippet", "ExpectedStatus", "ExpectedResponseExample",
+    "TestStatus", "LLMVerdict", "LLMNotes", "LLMCache", "VerdictSource", "PromptTokens",
+    "ElapsedSecs", "HandshakeSecs", "TransferSecs",
+    "VariantKey", "ResponseBodyOffset", "ResponseBodyLength",
+]
+# Typed report columns (everything else is text) for JSONL and Parquet output.
+REPORT_FIELD_TYPES = {
+    "ActualStatus": int, "ExpectedStatus": int, "PromptTokens": int,
+    "ElapsedSecs": float, "HandshakeSecs": float, "TransferSecs": float,
+    "ResponseBodyOffset": int, "ResponseBodyLength": int,
+}
+# Parquet rows are buffered and written as row groups of this size.
+PARQUET_ROW_GROUP_SIZE = 1000
 
 def write_csv(path: str, rows: List[Dict]) -> None:
     if not rows:
@@ -12,3 +39,277 @@ def write_csv(path: str, rows: List[Dict]) -> None:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(rows)
+
+
+def bodies_path(report_path: str) -> str:
+    return f"{report_path}.bodies"
+
+
+def read_response_body(report_path: str, offset, length) -> Optional[str]:
+    """Full response body stored in the side file of report_path, or None if unavailable."""
+    try:
+        offset, length = int(offset), int(length)
+        with open(bodies_path(report_path), "rb") as f:
+            f.seek(offset)
+            return f.read(length).decode("utf-8", errors="replace")
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def report_format(path: str) -> str:
+    """"csv", "jsonl" or "parquet", from the report file extension."""
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    return ext if ext in ("jsonl", "parquet") else "csv"
+
+
+def _typed(record: Dict) -> Dict:
+    typed = {}
+    for key, value in record.items():
+        kind = REPORT_FIELD_TYPES.get(key)
+        if kind is None:
+            typed[key] = None if value is None else str(value)
+            continue
+        try:
+            typed[key] = kind(value) if value not in ("", None) else None
+        except (TypeError, ValueError):
+            typed[key] = None
+    return typed
+
+
+def _complete(rows: List[Dict]) -> List[Dict]:
+    return [row for row in rows if None not in row and row.get("VariantKey")]
+
+
+class _CsvSink:
+    def __init__(self, path: str, fieldnames: List[str]):
+        self.path = path
+        self.fieldnames = fieldnames
+
+    def read_completed(self) -> Optional[List[Dict]]:
+        try:
+            with open(self.path, "r", newline="", encoding="utf-8") as f:
+                content = f.read()
+        except OSError:
+            return None
+        reader = csv.DictReader(content.splitlines(keepends=True))
+        if reader.fieldnames != self.fieldnames:
+            return None
+        rows = list(reader)
+        if rows and not content.endswith("\n"):
+            rows.pop()
+        return _complete([row for row in rows if None not in row.values()])
+
+    def open(self) -> None:
+        self._file = open(self.path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        self._writer.writeheader()
+
+    def write(self, record: Dict) -> None:
+        self._writer.writerow(record)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _JsonlSink(_CsvSink):
+    def read_completed(self) -> Optional[List[Dict]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().split("\n")
+        except OSError:
+            return None
+        rows = []
+        # The last element is "" when the file ends cleanly, or a line cut short by a crash
+        for line in lines[:-1]:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if list(row) != self.fieldnames:
+                return None
+            rows.append(row)
+        return _complete(rows)
+
+    def open(self) -> None:
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, record: Dict) -> None:
+        self._file.write(json.dumps(_typed(record), ensure_ascii=False) + "\n")
+
+
+class _ParquetSink(_CsvSink):
+    """Parquet needs its footer, so rows are only readable once the report is closed."""
+
+    def __init__(self, path: str, fieldnames: List[str]):
+        if pa is None:
+            raise RuntimeError("Parquet reports need pyarrow (pip install pyarrow)")
+        super().__init__(path, fieldnames)
+        self.schema = pa.schema([
+            (name, {int: pa.int64(), float: pa.float64()}.get(REPORT_FIELD_TYPES.get(name), pa.string()))
+            for name in fieldnames
+        ])
+        self._buffer: List[Dict] = []
+
+    def read_completed(self) -> Optional[List[Dict]]:
+        try:
+            table = pq.read_table(self.path)
+        except Exception:
+            return None
+        if table.schema.names != self.fieldnames:
+            return None
+        return _complete(table.to_pylist())
+
+    def open(self) -> None:
+        self._writer = pq.ParquetWriter(self.path, self.schema)
+
+    def write(self, record: Dict) -> None:
+        self._buffer.append(_typed(record))
+        if len(self._buffer) >= PARQUET_ROW_GROUP_SIZE:
+            self._write_buffer()
+
+    def _write_buffer(self) -> None:
+        if self._buffer:
+            self._writer.write_table(pa.Table.from_pylist(self._buffer, schema=self.schema))
+            self._buffer = []
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self._write_buffer()
+        self._writer.close()
+
+
+_SINKS = {"csv": _CsvSink, "jsonl": _JsonlSink, "parquet": _ParquetSink}
+
+
+class StreamingReportWriter:
+    """
+    Appends report rows to a CSV, JSONL or Parquet file (chosen by the file
+    extension) as soon as they are complete, in the order they were added.
+    CSV and JSONL are flushed after each row so an interrupted run keeps its
+    results; Parquet is written in row groups and readable once closed.
+    Response bodies longer than body_limit are written to a side file
+    (<report>.bodies); the row keeps a truncated snippet plus the byte offset
+    and length of the full body (see read_response_body).
+    With resume=True the rows of an earlier run are kept and their VariantKey
+    values are available in completed_keys, so those variants can be skipped.
+    """
+
+    def __init__(self, path: str, fieldnames: List[str] = REPORT_FIELDS, body_limit: int = 2000, resume: bool = False):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.body_limit = body_limit
+        self.completed_keys: Set[str] = set()
+        self.rows_written = 0
+        self._lock = threading.Lock()
+        self._next_seq = 0
+        self._next_to_write = 0
+        self._ready: Dict[int, Dict] = {}
+        self._seq_by_row: Dict[int, int] = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._sink = _SINKS[report_format(path)](path, fieldnames)
+        existing = self._sink.read_completed() if resume else None
+        # Rewritten from scratch on resume, without a row cut short by a crash
+        self._sink.open()
+        if existing is None:
+            self._bodies = open(bodies_path(path), "wb")
+        else:
+            self.completed_keys = {row["VariantKey"] for row in existing}
+            for row in existing:
+                self._sink.write(row)
+            self._bodies = open(bodies_path(path), "ab")
+            print(f"[INFO] Resuming report {path}: {len(existing)} completed tests will be skipped")
+        self._sink.flush()
+
+    def add(self, row: Dict) -> None:
+        """Reserve the row's position in the report; it is written once complete() is called for it."""
+        with self._lock:
+            self._seq_by_row[id(row)] = self._next_seq
+            self._next_seq += 1
+
+    def complete(self, row: Dict) -> None:
+        """Mark the row as final and write every completed row that is next in order."""
+        with self._lock:
+            seq = self._seq_by_row.pop(id(row), None)
+            if seq is None:
+                return
+            self._ready[seq] = row
+            while self._next_to_write in self._ready:
+                self._write(self._ready.pop(self._next_to_write))
+                self._next_to_write += 1
+            self._sink.flush()
+
+    def _write(self, row: Dict) -> None:
+        row = dict(row)
+        body = row.get("ActualResponseSnippet") or ""
+        if len(body) > self.body_limit:
+            data = body.encode("utf-8")
+            row["ResponseBodyOffset"] = self._bodies.tell()
+            row["ResponseBodyLength"] = len(data)
+            self._bodies.write(data)
+            self._bodies.flush()
+            row["ActualResponseSnippet"] = body[:self.body_limit] + "...(truncated)"
+        self._sink.write({k: row.get(k, "") for k in self.fieldnames})
+        self.rows_written += 1
+
+    def close(self) -> None:
+        with self._lock:
+            # Rows that never completed are written as they are, in order
+            for seq in sorted(self._ready):
+                self._write(self._ready.pop(seq))
+            self._sink.close()
+            self._bodies.close()
+
+
+def load_report(path: str, columns: Optional[List[str]] = None):
+    """
+    Load a report as a DataFrame whose index is the row number in the file.
+    Only `columns` are read (Parquet and CSV skip the other columns entirely).
+    """
+    import pandas as pd
+
+    fmt = report_format(path)
+    if fmt == "parquet":
+        available = pq.ParquetFile(path).schema_arrow.names
+        return pd.read_parquet(path, columns=[c for c in columns if c in available] if columns else None)
+    if fmt == "jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        df = pd.DataFrame.from_records(records)
+        return df[[c for c in columns if c in df.columns]] if columns else df
+    return pd.read_csv(path, usecols=(lambda c: c in columns) if columns else None)
+
+
+def read_report_row(path: str, index: int, columns: Optional[List[str]] = None) -> Dict:
+    """Read `columns` of the row at position index without loading the rest of the report."""
+    fmt = report_format(path)
+    if fmt == "parquet":
+        parquet_file = pq.ParquetFile(path)
+        names = [c for c in columns if c in parquet_file.schema_arrow.names] if columns else None
+        for group in range(parquet_file.num_row_groups):
+            rows = parquet_file.metadata.row_group(group).num_rows
+            if index < rows:
+                return parquet_file.read_row_group(group, columns=names).slice(index, 1).to_pylist()[0]
+            index -= rows
+        raise IndexError("report row out of range")
+    if fmt == "jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                if i == index:
+                    row = json.loads(line)
+                    return {c: row.get(c) for c in columns} if columns else row
+        raise IndexError("report row out of range")
+    import pandas as pd
+
+    df = pd.read_csv(path, skiprows=range(1, index + 1), nrows=1,
+                     usecols=(lambda c: c in columns) if columns else None)
+    if df.empty:
+        raise IndexError("report row out of range")
+    return df.iloc[0].to_dict()
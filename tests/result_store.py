@@ -0,0 +1,273 @@
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    spec_path TEXT,
+    base_url TEXT,
+    total INTEGER DEFAULT 0,
+    passed INTEGER DEFAULT 0,
+    failed INTEGER DEFAULT 0,
+    summary TEXT
+);
+CREATE TABLE IF NOT EXISTS operations (
+    id INTEGER PRIMARY KEY,
+    method TEXT NOT NULL,
+    path TEXT NOT NULL,
+    UNIQUE (method, path)
+);
+CREATE TABLE IF NOT EXISTS variants (
+    id INTEGER PRIMARY KEY,
+    operation_id INTEGER NOT NULL REFERENCES operations(id),
+    variant_key TEXT NOT NULL UNIQUE,
+    description TEXT,
+    url TEXT,
+    request_headers TEXT,
+    request_body TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    variant_id INTEGER NOT NULL REFERENCES variants(id),
+    endpoint TEXT,
+    method TEXT,
+    expected_status INTEGER,
+    actual_status INTEGER,
+    test_status TEXT,
+    llm_verdict TEXT,
+    llm_notes TEXT,
+    llm_cache TEXT,
+    verdict_source TEXT,
+    prompt_tokens INTEGER,
+    elapsed_secs REAL,
+    handshake_secs REAL,
+    transfer_secs REAL,
+    response_snippet TEXT,
+    expected_example TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_run_endpoint ON results (run_id, endpoint);
+CREATE INDEX IF NOT EXISTS idx_results_run_status ON results (run_id, test_status);
+CREATE INDEX IF NOT EXISTS idx_results_run_verdict ON results (run_id, llm_verdict);
+CREATE INDEX IF NOT EXISTS idx_results_variant ON results (variant_id, run_id);
+"""
+# PRAGMA user_version of the current layout; see ResultStore._migrate
+SCHEMA_VERSION = 1
+
+# Report row column -> results column
+RESULT_COLUMNS = {
+    "Endpoint": "endpoint",
+    "Method": "method",
+    "ExpectedStatus": "expected_status",
+    "ActualStatus": "actual_status",
+    "TestStatus": "test_status",
+    "LLMVerdict": "llm_verdict",
+    "LLMNotes": "llm_notes",
+    "LLMCache": "llm_cache",
+    "VerdictSource": "verdict_source",
+    "PromptTokens": "prompt_tokens",
+    "ElapsedSecs": "elapsed_secs",
+    "HandshakeSecs": "handshake_secs",
+    "TransferSecs": "transfer_secs",
+    "ActualResponseSnippet": "response_snippet",
+    "ExpectedResponseExample": "expected_example",
+}
+# Columns of query_results(), named like the report columns
+_SELECT_COLUMNS = (
+    "r.id AS ResultId, v.description AS Description, r.endpoint AS Endpoint, r.method AS Method, "
+    "v.url AS URL, r.expected_status AS ExpectedStatus, r.actual_status AS ActualStatus, "
+    "r.test_status AS TestStatus, r.llm_verdict AS LLMVerdict, r.elapsed_secs AS ElapsedSecs"
+)
+
+
+class ResultStore:
+    """
+    SQLite history of test runs: runs, operations, variants (keyed by the
+    TestCaseIndex fingerprint) and one result per variant and run; adding a
+    variant's result again replaces the earlier one.
+    Rows passed to add() are buffered and inserted batch_size at a time in
+    a single transaction. Every method may be called from any thread.
+    With read_only=True the database is opened for the dashboard queries
+    only; open one such store per reader instead of sharing a writable one.
+    """
+
+    def __init__(self, path: str, batch_size: int = 200, body_limit: int = 2000, read_only: bool = False):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.body_limit = body_limit
+        self.run_id: Optional[int] = None
+        self._lock = threading.Lock()
+        self._buffer: List[Dict] = []
+        self._operation_ids: Dict[tuple, int] = {}
+        if read_only:
+            uri = pathlib.Path(path).resolve().as_uri() + "?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        with self._conn:
+            # Version 1: one result per (run, variant); keep the latest of any duplicates
+            self._conn.execute(
+                "DELETE FROM results WHERE id NOT IN (SELECT MAX(id) FROM results GROUP BY run_id, variant_id)"
+            )
+            self._conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_results_run_variant ON results (run_id, variant_id)"
+            )
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def start_run(self, spec_path: str = "", base_url: str = "", resume: bool = False) -> int:
+        """Record a new run, or with resume=True continue the latest one (only when the report was resumed)."""
+        with self._lock, self._conn:
+            latest = self._conn.execute("SELECT MAX(id) FROM runs").fetchone()[0]
+            if resume and latest is not None:
+                self.run_id = latest
+            else:
+                self.run_id = self._conn.execute(
+                    "INSERT INTO runs (started_at, spec_path, base_url) VALUES (?, ?, ?)",
+                    (time.time(), spec_path, base_url),
+                ).lastrowid
+        return self.run_id
+
+    def add(self, row: Dict) -> None:
+        with self._lock:
+            self._buffer.append(dict(row))
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _operation_id(self, method: str, path: str) -> int:
+        key = (method, path)
+        if key not in self._operation_ids:
+            self._conn.execute("INSERT OR IGNORE INTO operations (method, path) VALUES (?, ?)", key)
+            self._operation_ids[key] = self._conn.execute(
+                "SELECT id FROM operations WHERE method = ? AND path = ?", key
+            ).fetchone()[0]
+        return self._operation_ids[key]
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        with self._conn:
+            variant_ids = []
+            for row in rows:
+                operation_id = self._operation_id(row.get("Method"), row.get("Endpoint"))
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO variants "
+                    "(operation_id, variant_key, description, url, request_headers, request_body) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (operation_id, row.get("VariantKey"), row.get("Description"), row.get("URL"),
+                     row.get("RequestHeaders"), row.get("RequestBody")),
+                )
+                variant_ids.append(self._conn.execute(
+                    "SELECT id FROM variants WHERE variant_key = ?", (row.get("VariantKey"),)
+                ).fetchone()[0])
+            columns = list(RESULT_COLUMNS.values())
+            self._conn.executemany(
+                f"INSERT INTO results (run_id, variant_id, {', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * (len(columns) + 2))}) "
+                "ON CONFLICT (run_id, variant_id) DO UPDATE SET "
+                + ", ".join(f"{col} = excluded.{col}" for col in columns),
+                [
+                    (self.run_id, variant_id, *(self._value(row, key) for key in RESULT_COLUMNS))
+                    for row, variant_id in zip(rows, variant_ids)
+                ],
+            )
+
+    def _value(self, row: Dict, key: str):
+        value = row.get(key)
+        if key == "ActualResponseSnippet" and isinstance(value, str) and len(value) > self.body_limit:
+            return value[:self.body_limit] + "...(truncated)"
+        return value
+
+    def finish_run(self, summary: str = "") -> None:
+        with self._lock:
+            self._flush_locked()
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE runs SET finished_at = ?, summary = ?, "
+                    "total = (SELECT COUNT(*) FROM results WHERE run_id = runs.id), "
+                    "passed = (SELECT COUNT(*) FROM results WHERE run_id = runs.id AND test_status = 'PASS'), "
+                    "failed = (SELECT COUNT(*) FROM results WHERE run_id = runs.id AND test_status = 'FAIL') "
+                    "WHERE id = ?",
+                    (time.time(), summary, self.run_id),
+                )
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+    # Queries used by the dashboard
+
+    def list_runs(self) -> List[Dict]:
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT id, started_at, finished_at, total, passed, failed FROM runs ORDER BY id DESC"
+            )
+            names = [d[0] for d in cur.description]
+            return [dict(zip(names, values)) for values in cur.fetchall()]
+
+    def test_statuses(self, run_id: int) -> List[str]:
+        with self._lock:
+            return [s for (s,) in self._conn.execute(
+                "SELECT DISTINCT test_status FROM results WHERE run_id = ? AND test_status IS NOT NULL "
+                "ORDER BY test_status", (run_id,)
+            )]
+
+    def query_results(self, run_id: int, test_status: Optional[str] = None):
+        """Table of one run's results as a DataFrame, optionally filtered by TestStatus."""
+        import pandas as pd
+
+        sql = (f"SELECT {_SELECT_COLUMNS} FROM results r JOIN variants v ON v.id = r.variant_id "
+               "WHERE r.run_id = ?")
+        params: list = [run_id]
+        if test_status:
+            sql += " AND r.test_status = ?"
+            params.append(test_status)
+        with self._lock:
+            return pd.read_sql_query(sql + " ORDER BY r.id", self._conn, params=params)
+
+    def get_result(self, result_id: int) -> Dict:
+        """Every report column of one result."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT v.description AS Description, v.url AS URL, v.request_headers AS RequestHeaders, "
+                "v.request_body AS RequestBody, v.variant_key AS VariantKey, "
+                + ", ".join(f"r.{col} AS {key}" for key, col in RESULT_COLUMNS.items())
+                + " FROM results r JOIN variants v ON v.id = r.variant_id WHERE r.id = ?",
+                (result_id,),
+            )
+            values = cur.fetchone()
+            return dict(zip([d[0] for d in cur.description], values)) if values else {}
+
+    def regressions(self, run_id: int, previous_run_id: int):
+        """Variants that passed in previous_run_id and fail in run_id."""
+        import pandas as pd
+
+        with self._lock:
+            return pd.read_sql_query(
+                f"SELECT {_SELECT_COLUMNS} FROM results r JOIN variants v ON v.id = r.variant_id "
+                "JOIN results p ON p.variant_id = r.variant_id AND p.run_id = ? AND p.test_status = 'PASS' "
+                "WHERE r.run_id = ? AND r.test_status = 'FAIL' ORDER BY r.id",
+                self._conn,
+                params=[previous_run_id, run_id],
+            )
@@ -1,175 +1,92 @@
 import json
-from itertools import combinations
-import copy
-from typing import List, Dict, Any,Union
-
-def deep_set(d: dict, path: list, value: any) -> dict:
-    d = copy.deepcopy(d)
-    cur = d
-    for i, p in enumerate(path):
-        is_last = i == len(path) - 1
-        # Check if path item is digit indexing a list
-        if p.isdigit():
-            idx = int(p)
-            # Ensure current is a list
-            if not isinstance(cur, list):
-                # If not list, replace with list
-                # This can happen if schema expects list here
-                cur_type = type(cur)
-                cur_parent = d
-                for q in path[:i]:
-                    if q.isdigit():
-                        q = int(q)
-                    cur_parent = cur_parent[q]
-                cur_parent[path[i - 1]] = []
-                cur = cur_parent[path[i - 1]]
-
-            # Extend list if needed
-            while len(cur) <= idx:
-                cur.append({} if not is_last else None)
-            if is_last:
-                cur[idx] = value
-            else:
-                if not isinstance(cur[idx], dict) and not isinstance(cur[idx], list):
-                    cur[idx] = {}
-                cur = cur[idx]
-        else:
-            # path item is dict key
-            if not isinstance(cur, dict):
-                # Fix structure: replace current with dict
-                cur_type = type(cur)
-                cur_parent = d
-                for q in path[:i]:
-                    if q.isdigit():
-                        q = int(q)
-                    cur_parent = cur_parent[q]
-                cur_parent[path[i -1 ]] = {}
-                cur = cur_parent[path[i -1]]
-
-            if is_last:
-                cur[p] = value
-            else:
-                if p not in cur or not isinstance(cur[p], (dict, list)):
-                    cur[p] = {}
-                cur = cur[p]
-    return d
-def deep_del(d: Union[dict, list], path: List[str]) -> Union[dict, list]:
-    """
-    Recursively deletes a key/index in a nested dict/list structure given a path.
-    Handles missing keys and indexes gracefully.
-    """
-    d = copy.deepcopy(d)
-    cur = d
-    for i, p in enumerate(path):
-        is_last = (i == len(path) - 1)
-        is_index = p.isdigit()
-
-        if is_index:
-            idx = int(p)
-            if not isinstance(cur, list) or len(cur) <= idx:
-                # Path does not exist, nothing to delete
-                return d
-
-            if is_last:
-                cur.pop(idx)
-            else:
-                cur = cur[idx]
-
-        else:  # dict key
-            if not isinstance(cur, dict) or p not in cur:
-                # Path does not exist, nothing to delete
-                return d
-
-            if is_last:
-                cur.pop(p, None)
-            else:
-                cur = cur[p]
-
-    return d
-def generate_tests_for_field(op: Dict, base_body: Dict, full_path: List[str], field_schema: Dict, is_required: bool) -> List[Dict]:
-    tests = []
-
+import hashlib
+from itertools import combinations, islice
+from typing import List, Dict, Any, Tuple, Iterable, Iterator
+
+from openapi.schema_compiler import ARRAY_ITEM, FieldDescriptor, build_field_index, compiled_operation
+from tests.variant import TestVariant, DELETE
+from tests.covering_array import covering_array
+
+_INVALID_TYPE_VALUES = {
+    "string": 12345,
+    "integer": "invalid_string",
+    "number": "invalid_string",
+    "boolean": "not_a_boolean",
+    "array": "not_an_array",
+    "object": "not_an_object"
+}
+def generate_tests_for_field(op: Dict, full_path: List[str], field: FieldDescriptor) -> Iterator[Dict]:
     # 1. Missing required field
-    if is_required:
-        missing_case = copy.deepcopy(op)
-        missing_case["body"] = deep_del(base_body, full_path)
-        missing_case["description"] = f"Missing required body field '{'.'.join(full_path)}'"
-        tests.append(missing_case)
+    if field.required:
+        yield TestVariant(op, f"Missing required body field '{'.'.join(full_path)}'", body_changes=[(full_path, DELETE)])
 
     # 2. Blank string (if string type)
-    if field_schema.get("type") == "string":
-        blank_case = copy.deepcopy(op)
-        blank_case["body"] = deep_set(base_body, full_path, "")
-        blank_case["description"] = f"Blank string for body field '{'.'.join(full_path)}'"
-        tests.append(blank_case)
+    if field.type == "string":
+        yield TestVariant(op, f"Blank string for body field '{'.'.join(full_path)}'", body_changes=[(full_path, "")])
 
     # 3. Invalid type test
-    invalid_type_values = {
-        "string": 12345,
-        "integer": "invalid_string",
-        "number": "invalid_string",
-        "boolean": "not_a_boolean",
-        "array": "not_an_array",
-        "object": "not_an_object"
-    }
-    invalid_val = invalid_type_values.get(field_schema.get("type"), None)
+    invalid_val = _INVALID_TYPE_VALUES.get(field.type, None)
     if invalid_val is not None:
-        invalid_case = copy.deepcopy(op)
-        invalid_case["body"] = deep_set(base_body, full_path, invalid_val)
-        invalid_case["description"] = f"Invalid type for body field '{'.'.join(full_path)}'"
-        tests.append(invalid_case)
+        yield TestVariant(op, f"Invalid type for body field '{'.'.join(full_path)}'", body_changes=[(full_path, invalid_val)])
 
     # 4. Invalid enum value
-    enum_vals = field_schema.get("enum")
-    if enum_vals and isinstance(enum_vals, list):
+    if field.enum:
         invalid_enum_val = "invalid_enum_val_123"
-        if invalid_enum_val not in enum_vals:
-            invalid_enum_case = copy.deepcopy(op)
-            invalid_enum_case["body"] = deep_set(base_body, full_path, invalid_enum_val)
-            invalid_enum_case["description"] = f"Invalid enum value for body field '{'.'.join(full_path)}'"
-            tests.append(invalid_enum_case)
-
-    return tests
-def recursively_generate_body_tests(op: Dict, base_body: Dict, current_path: List[str], schema: Dict) -> List[Dict]:
+        if invalid_enum_val not in field.enum:
+            yield TestVariant(op, f"Invalid enum value for body field '{'.'.join(full_path)}'", body_changes=[(full_path, invalid_enum_val)])
+def _containers(
+    containers: Dict[Tuple[str, ...], List[Tuple[List[str], Any]]], prefix: Tuple[str, ...]
+) -> List[Tuple[List[str], Any]]:
+    """
+    (concrete path, body node) pairs of the object(s) at a field's parent
+    prefix; ARRAY_ITEM expands to every item present in the body. Memoised
+    in containers, so each prefix is resolved once from its own parent.
+    """
+    if prefix not in containers:
+        parents = _containers(containers, prefix[:-1])
+        if prefix[-1] == ARRAY_ITEM:
+            containers[prefix] = [
+                (path + [str(idx)], item)
+                for path, node in parents if isinstance(node, list)
+                for idx, item in enumerate(node)
+            ]
+        else:
+            containers[prefix] = [
+                (path + [prefix[-1]], node.get(prefix[-1]) if isinstance(node, dict) else None)
+                for path, node in parents
+            ]
+    return containers[prefix]
+def recursively_generate_body_tests(op: Dict, base_body: Dict, current_path: List[str], schema: Dict) -> Iterator[Dict]:
     """
-    Recursively generate body tests for all nested fields in schema.
+    Generate body tests for all nested fields in schema, from its field index
+    (one linear scan instead of a schema walk per call).
     op: base operation dict
     base_body: current request body dict
     current_path: path list to current schema level, e.g. ['templates', '0', 'consentMode']
     schema: current schema dict at this path
+    Fields inside arrays of objects are tested for every item present in base_body.
     """
-    tests = []
-    if not isinstance(schema, dict):
-        return tests
-    properties = schema.get("properties", {})
-    required = schema.get("required", [])
-
-    for prop, prop_schema in properties.items():
-        path = current_path + [prop]
-        is_required = prop in required
-
-        # Generate tests for this field
-        tests.extend(generate_tests_for_field(op, base_body, path, prop_schema, is_required))
-
-        # Recurse into nested objects
-        if prop_schema.get("type") == "object":
-            nested_body = base_body.get(prop, {}) if base_body else {}
-            tests.extend(recursively_generate_body_tests(op, nested_body, path, prop_schema))
-
-        # Recurse into arrays with object items
-        elif prop_schema.get("type") == "array":
-            items_schema = prop_schema.get("items", {})
-            if items_schema.get("type") == "object":
-                arr = base_body.get(prop, []) if base_body else []
-                if isinstance(arr, list):
-                    for idx, item in enumerate(arr):
-                        tests.extend(recursively_generate_body_tests(op, item, path + [str(idx)], items_schema))
-
-    return tests
-def generate_combinatorial_body_tests(op: Dict, spec: Dict, max_comb: int = 2) -> List[Dict]:
+    containers = {(): [(list(current_path), base_body)]}
+    for field in build_field_index(schema):
+        for path, _ in _containers(containers, field.path[:-1]):
+            yield from generate_tests_for_field(op, path + [field.path[-1]], field)
+def generate_combinatorial_body_tests(
+    op: Dict,
+    spec: Dict,
+    max_comb: int = 2,
+    strategy: str = "exhaustive",
+    strength: int = 2,
+    budget: int = None,
+    seed: int = 0,
+) -> Iterator[Dict]:
     """
     Generate tests with combinations of multiple missing or invalid body fields.
-    max_comb: maximum number of fields to combine in one test.
+    max_comb: maximum number of fields to combine in one test (exhaustive strategy).
+    strategy: "exhaustive" enumerates every field combination up to max_comb;
+              "covering" builds a t-way covering array where every `strength`
+              fields see every pairing of valid/missing/invalid at least once.
+    budget: maximum number of tests generated for this operation (None = unlimited).
+    seed: seed for the covering array so runs are reproducible.
     """
     base_body = op.get("body") or {}
 
@@ -180,27 +97,11 @@ def generate_combinatorial_body_tests(op: Dict, spec: Dict, max_comb: int = 2) -
         except Exception:
             base_body = {}
 
-    tests = []
-    path_spec = spec.get("paths", {}).get(op["path"], {})
-    method_spec = path_spec.get(op["method"].lower(), {})
-    rb_spec = method_spec.get("requestBody", {})
-    schema = rb_spec.get("content", {}).get("application/json", {}).get("schema", {})
-    required_fields = schema.get("required", []) if isinstance(schema, dict) else []
+    compiled = compiled_operation(spec, op)
 
     fields = list(base_body.keys())
     if len(fields) < 2:
-        return []
-
-    # Generate combinations of missing required fields
-    for r in range(2, min(max_comb + 1, len(fields) + 1)):
-        for combo in combinations(fields, r):
-            missing_case = copy.deepcopy(op)
-            body_copy = copy.deepcopy(base_body)
-            for field in combo:
-                body_copy.pop(field, None)
-            missing_case["body"] = body_copy
-            missing_case["description"] = f"Missing multiple body fields {combo}"
-            tests.append(missing_case)
+        return
 
     # Generate combinations of invalid types
     invalid_type_map = {
@@ -212,93 +113,130 @@ def generate_combinatorial_body_tests(op: Dict, spec: Dict, max_comb: int = 2) -
         "object": "notanobject",
     }
 
-    properties = schema.get("properties", {}) if isinstance(schema, dict) else {}
+    field_types = {f.path[0]: f.type or "string" for f in compiled.top_level_fields}
+
+    def invalid_value(field: str) -> Any:
+        t = field_types.get(field, "string")
+        return invalid_type_map.get(t, "invalid")
 
+    if strategy == "covering":
+        cases = _covering_body_tests(op, fields, invalid_value, strength, seed)
+    else:
+        cases = _exhaustive_body_tests(op, fields, invalid_value, max_comb)
+    yield from islice(cases, budget)
+def _exhaustive_body_tests(op: Dict, fields: List[str], invalid_value, max_comb: int) -> Iterator[Dict]:
+    # Generate combinations of missing required fields
     for r in range(2, min(max_comb + 1, len(fields) + 1)):
         for combo in combinations(fields, r):
-            invalid_case = copy.deepcopy(op)
-            body_copy = copy.deepcopy(base_body)
-            for field in combo:
-                field_schema = properties.get(field, {})
-                t = field_schema.get("type", "string")
-                invalid_val = invalid_type_map.get(t, "invalid")
-                body_copy[field] = invalid_val
-            invalid_case["body"] = body_copy
-            invalid_case["description"] = f"Invalid types for multiple body fields {combo}"
-            tests.append(invalid_case)
-
-    return tests
-def combine_unique_test_cases(cases_1: List[Dict], cases_2: List[Dict]) -> List[Dict]:
-    combined = []
-    seen = set()
-    for c in (cases_1 or []) + (cases_2 or []):
-        key = (
-            json.dumps(c.get("headers", {}), sort_keys=True),
-            json.dumps(c.get("body", {}), sort_keys=True),
+            yield TestVariant(
+                op,
+                f"Missing multiple body fields {combo}",
+                body_changes=[([field], DELETE) for field in combo],
+            )
+
+    for r in range(2, min(max_comb + 1, len(fields) + 1)):
+        for combo in combinations(fields, r):
+            changes = [([field], invalid_value(field)) for field in combo]
+            yield TestVariant(op, f"Invalid types for multiple body fields {combo}", body_changes=changes)
+def _covering_body_tests(op: Dict, fields: List[str], invalid_value, strength: int, seed: int) -> Iterator[Dict]:
+    # Each field is a factor with three levels: 0 = valid, 1 = missing, 2 = invalid type.
+    for row in covering_array(len(fields), 3, strength=strength, seed=seed):
+        missing = tuple(f for f, level in zip(fields, row) if level == 1)
+        invalid = tuple(f for f, level in zip(fields, row) if level == 2)
+        if not missing and not invalid:
+            continue
+        changes = [([field], DELETE) for field in missing]
+        changes += [([field], invalid_value(field)) for field in invalid]
+        yield TestVariant(
+            op,
+            f"Covering combination (t={strength}): missing body fields {missing}, invalid types {invalid}",
+            body_changes=changes,
         )
-        if key not in seen:
-            seen.add(key)
-            combined.append(c)
-    return combined
-def generate_body_field_boundary_tests(op: Dict[str, Any], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
-    tests = []
-    base_body = op.get("body") or {}
-    rb_spec = spec.get("paths", {}).get(op["path"], {}).get(op["method"].lower(), {}).get("requestBody", {}) or {}
-    schema = rb_spec.get("content", {}).get("application/json", {}).get("schema", {}) or {}
+# Key under which TestCaseIndex.add() stores a case's fingerprint
+VARIANT_KEY = "variant_key"
+
+
+class TestCaseIndex:
+    """
+    De-duplication index keyed on a stable content hash of method, URL, headers and body.
+    Each case is serialised exactly once: add() stores the hash in the case
+    under VARIANT_KEY, and key_of() reads it back. One index can be shared
+    across all operations of a run so duplicates are dropped in a single linear pass.
+    """
 
-    properties = schema.get("properties", {}) if isinstance(schema, dict) else {}
+    def __init__(self):
+        self._seen = set()
 
-    for field, field_schema in properties.items():
-        field_type = field_schema.get("type", "string")
+    @staticmethod
+    def fingerprint(case: Dict) -> str:
+        payload = json.dumps(
+            [case.get("method"), case.get("url"), case.get("headers", {}), case.get("body", {})],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+    def add(self, case: Dict) -> bool:
+        """Record case and return True if it was not seen before."""
+        key = self.fingerprint(case)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        case[VARIANT_KEY] = key
+        return True
+
+    @classmethod
+    def key_of(cls, case: Dict) -> str:
+        """The fingerprint stored by add(), computed only for a case that never went through an index."""
+        key = case.get(VARIANT_KEY)
+        return key if key is not None else cls.fingerprint(case)
+
+    def unique(self, *sources: Iterable[Dict]) -> Iterator[Dict]:
+        """Lazily chain any number of sources, yielding only unseen cases."""
+        for source in sources:
+            for c in source or ():
+                if self.add(c):
+                    yield c
+
+    def __len__(self) -> int:
+        return len(self._seen)
+def iter_unique_test_cases(*sources: Iterable[Dict], index: TestCaseIndex = None) -> Iterator[Dict]:
+    """
+    Lazily chain test case sources, dropping cases already seen by index
+    (a fresh index when none is given).
+    """
+    return (index if index is not None else TestCaseIndex()).unique(*sources)
+def combine_unique_test_cases(*sources: Iterable[Dict]) -> List[Dict]:
+    return list(iter_unique_test_cases(*sources))
+def generate_body_field_boundary_tests(op: Dict[str, Any], spec: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    for descriptor in compiled_operation(spec, op).top_level_fields:
+        field = descriptor.path[0]
+        field_type = descriptor.type or "string"
         path = [field]
 
         if field_type == "string":
-            min_len = field_schema.get("minLength")
-            max_len = field_schema.get("maxLength")
+            min_len = descriptor.min_length
+            max_len = descriptor.max_length
 
             if min_len is not None and min_len > 0:
-                below_min_case = copy.deepcopy(op)
-                below_min_case["body"] = deep_set(base_body, path, "a" * (min_len - 1))
-                below_min_case["description"] = f"Below minLength boundary for '{field}'"
-                tests.append(below_min_case)
+                yield TestVariant(op, f"Below minLength boundary for '{field}'", body_changes=[(path, "a" * (min_len - 1))])
 
             if max_len is not None:
-                above_max_case = copy.deepcopy(op)
-                above_max_case["body"] = deep_set(base_body, path, "a" * (max_len + 1))
-                above_max_case["description"] = f"Above maxLength boundary for '{field}'"
-                tests.append(above_max_case)
+                yield TestVariant(op, f"Above maxLength boundary for '{field}'", body_changes=[(path, "a" * (max_len + 1))])
 
         elif field_type in ("integer", "number"):
-            minimum = field_schema.get("minimum")
-            maximum = field_schema.get("maximum")
+            minimum = descriptor.minimum
+            maximum = descriptor.maximum
 
             if minimum is not None:
-                below_min_case = copy.deepcopy(op)
                 val = minimum - 1 if isinstance(minimum, (int, float)) else minimum
-                below_min_case["body"] = deep_set(base_body, path, val)
-                below_min_case["description"] = f"Below minimum boundary for '{field}'"
-                tests.append(below_min_case)
+                yield TestVariant(op, f"Below minimum boundary for '{field}'", body_changes=[(path, val)])
 
             if maximum is not None:
-                above_max_case = copy.deepcopy(op)
                 val = maximum + 1 if isinstance(maximum, (int, float)) else maximum
-                above_max_case["body"] = deep_set(base_body, path, val)
-                above_max_case["description"] = f"Above maximum boundary for '{field}'"
-                tests.append(above_max_case)
-
-    return tests
-def generate_enhanced_body_tests(op: Dict[str, Any], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
-    tests = []
-    base_body = op.get("body") or {}
-    rb_spec = spec.get("paths", {}).get(op["path"], {}).get(op["method"].lower(), {}).get("requestBody", {}) or {}
-    schema = rb_spec.get("content", {}).get("application/json", {}).get("schema", {}) or {}
-
-    required_fields = schema.get("required", []) if isinstance(schema, dict) else []
-    properties = schema.get("properties", {}) if isinstance(schema, dict) else {}
-
-    valid_case = copy.deepcopy(op)
-    valid_case["description"] = "Valid request with all required body fields"
-    tests.append(valid_case)
+                yield TestVariant(op, f"Above maximum boundary for '{field}'", body_changes=[(path, val)])
+def generate_enhanced_body_tests(op: Dict[str, Any], spec: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield TestVariant(op, "Valid request with all required body fields")
 
     invalid_type_values = {
         "string": 12345,
@@ -309,78 +247,42 @@ def generate_enhanced_body_tests(op: Dict[str, Any], spec: Dict[str, Any]) -> Li
         "object": "not_an_object"
     }
 
-    for field, field_schema in properties.items():
-        field_type = field_schema.get("type", "string")
+    for descriptor in compiled_operation(spec, op).top_level_fields:
+        field = descriptor.path[0]
+        field_type = descriptor.type or "string"
         path = [field]
-        is_required = field in required_fields
 
-        if is_required:
-            missing_case = copy.deepcopy(op)
-            missing_case["body"] = deep_del(base_body, path)
-            missing_case["description"] = f"Missing required body field '{field}'"
-            tests.append(missing_case)
+        if descriptor.required:
+            yield TestVariant(op, f"Missing required body field '{field}'", body_changes=[(path, DELETE)])
 
         if field_type == "string":
-            blank_case = copy.deepcopy(op)
-            blank_case["body"] = deep_set(base_body, path, "")
-            blank_case["description"] = f"Blank string for body field '{field}'"
-            tests.append(blank_case)
+            yield TestVariant(op, f"Blank string for body field '{field}'", body_changes=[(path, "")])
 
         invalid_val = invalid_type_values.get(field_type)
         if invalid_val is not None:
-            invalid_case = copy.deepcopy(op)
-            invalid_case["body"] = deep_set(base_body, path, invalid_val)
-            invalid_case["description"] = f"Invalid type for body field '{field}'"
-            tests.append(invalid_case)
+            yield TestVariant(op, f"Invalid type for body field '{field}'", body_changes=[(path, invalid_val)])
 
-        enum_vals = field_schema.get("enum")
-        if enum_vals and isinstance(enum_vals, list):
+        if descriptor.enum:
             invalid_enum_val = "invalid_enum_val_123"
-            if invalid_enum_val not in enum_vals:
-                invalid_enum_case = copy.deepcopy(op)
-                invalid_enum_case["body"] = deep_set(base_body, path, invalid_enum_val)
-                invalid_enum_case["description"] = f"Invalid enum value for body field '{field}'"
-                tests.append(invalid_enum_case)
-
-    return tests
-def generate_header_field_tests_exhaustive(op: Dict[str, Any], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
-    tests = []
-    base_headers = op.get("headers", {})
-    path_spec = spec.get("paths", {}).get(op["path"], {})
-    method_spec = path_spec.get(op["method"].lower(), {})
-    parameters = method_spec.get("parameters", []) or []
-
-    valid_case = copy.deepcopy(op)
-    valid_case["description"] = "Valid request with all required headers"
-    tests.append(valid_case)
+            if invalid_enum_val not in descriptor.enum:
+                yield TestVariant(op, f"Invalid enum value for body field '{field}'", body_changes=[(path, invalid_enum_val)])
+def generate_header_field_tests_exhaustive(op: Dict[str, Any], spec: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    parameters = compiled_operation(spec, op).parameters_in("header")
+
+    yield TestVariant(op, "Valid request with all required headers")
 
     for param in parameters:
-        if param.get("in") != "header":
-            continue
         header_name = param.get("name")
         required = param.get("required", False)
 
         if required:
-            missing_case = copy.deepcopy(op)
-            missing_headers = copy.deepcopy(base_headers)
-            missing_headers.pop(header_name, None)
-            missing_case["headers"] = missing_headers
-            missing_case["description"] = f"Missing required header '{header_name}'"
-            tests.append(missing_case)
-
-        blank_case = copy.deepcopy(op)
-        blank_headers = copy.deepcopy(base_headers)
-        blank_headers[header_name] = ""
-        blank_case["headers"] = blank_headers
-        blank_case["description"] = f"Blank header value for '{header_name}'"
-        tests.append(blank_case)
+            yield TestVariant(op, f"Missing required header '{header_name}'", header_changes=[(header_name, DELETE)])
+
+        yield TestVariant(op, f"Blank header value for '{header_name}'", header_changes=[(header_name, "")])
 
         for invalid_val in ["invalid-value-123", "!!!@@@"]:
-            invalid_case = copy.deepcopy(op)
-            invalid_headers = copy.deepcopy(base_headers)
-            invalid_headers[header_name] = invalid_val
-            invalid_case["headers"] = invalid_headers
-            invalid_case["description"] = f"Invalid header value '{invalid_val}' for '{header_name}'"
-            tests.append(invalid_case)
-
-    return tests
+            yield TestVariant(
+                op,
+                f"Invalid header value '{invalid_val}' for '{header_name}'",
+                header_changes=[(header_name, invalid_val)],
+            )
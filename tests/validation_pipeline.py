@@ -0,0 +1,237 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import PERPLEXITY_MODEL, LLM_PROMPT_TOKEN_BUDGET
+from tests.prompt_builder import estimate_tokens, extract_operation_spec, fit_prompt_parts
+from tests.rule_engine import pre_verdict
+from tests.validator import build_batch_prompt, build_validation_prompt, llm_validate_batch_with_kb
+from tests.verdict_cache import VerdictCache, verdict_fingerprint
+
+# Notes prefixes of verdicts that must not be cached (no real LLM answer).
+_UNCACHEABLE_NOTES = ("LLM error:", "LLM validation disabled", "Unparsed LLM output")
+
+
+class RateLimiter:
+    """Spaces calls evenly so that at most requests_per_minute start per minute."""
+
+    def __init__(self, requests_per_minute: Optional[int]):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ValidationPipeline:
+    """
+    Collects executed tests, decides conclusive ones with the local rule engine,
+    answers repeats from the verdict cache and sends the rest to the LLM in
+    batches of batch_size results per operation.
+    Batches are validated by a pool of `concurrency` worker threads, limited to
+    requests_per_minute, so HTTP execution keeps running while verdicts are
+    computed. Each prompt carries only the operation's spec fragment and is
+    fitted into token_budget (see tests.prompt_builder).
+    Report rows are filled in place (LLMVerdict, LLMNotes, LLMCache, VerdictSource,
+    PromptTokens) once their verdict is known, and on_complete(row) is called
+    (possibly from a worker thread) when a row is final. Call flush() at the
+    end of each operation and close() before closing the report.
+    """
+
+    def __init__(
+        self,
+        spec: Dict[str, Any],
+        api_key: str,
+        cache: VerdictCache,
+        batch_size: int = 1,
+        model: str = PERPLEXITY_MODEL,
+        concurrency: int = 1,
+        requests_per_minute: Optional[int] = None,
+        error_code_mapping: Optional[Dict[str, str]] = None,
+        use_llm_validation: bool = True,
+        token_budget: int = LLM_PROMPT_TOKEN_BUDGET,
+        on_complete: Optional[Callable[[Dict], None]] = None,
+    ):
+        self.on_complete = on_complete or (lambda row: None)
+        self.spec = spec
+        self.token_budget = token_budget
+        self.prompt_tokens = 0
+        # (path, method) -> (fragment with referenced components, fragment without)
+        self._spec_fragments: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        self.error_code_mapping = error_code_mapping or {}
+        self.use_llm_validation = use_llm_validation
+        self.total = 0
+        self.decided_locally = 0
+        self.api_key = api_key
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.model = model
+        self.llm_calls = 0
+        self.shared = 0
+        self._rate_limiter = RateLimiter(requests_per_minute)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="llm-validate")
+        self._futures = []
+        self._lock = threading.Lock()
+        # cache key -> {"item": validation input, "rows": report rows waiting for it}
+        self._pending: "OrderedDict[str, Dict]" = OrderedDict()
+        # Batches handed to the worker pool whose verdicts have not arrived yet
+        self._in_flight: Dict[str, Dict] = {}
+
+    def submit(
+        self,
+        row: Dict,
+        test_op: Dict,
+        actual_status: int,
+        actual_body_text: str,
+        kb_context: List[str],
+        expected_error: str,
+        rule_expected_status: Optional[int] = None,
+    ) -> None:
+        """rule_expected_status: the variant's own expected status (see tests.rule_engine.variant_expected_status)."""
+        self.total += 1
+        local = pre_verdict(
+            test_op, actual_status, actual_body_text, self.error_code_mapping, rule_expected_status
+        )
+        if local:
+            row["LLMVerdict"], row["LLMNotes"] = local
+            row["VerdictSource"] = "RULE"
+            self.decided_locally += 1
+            self.on_complete(row)
+            return
+        if not self.use_llm_validation:
+            self.on_complete(row)
+            return
+
+        key = verdict_fingerprint(test_op, actual_status, actual_body_text, expected_error)
+        with self._lock:
+            waiting = self._pending.get(key) or self._in_flight.get(key)
+            if waiting is not None:
+                # Same fingerprint as a test already waiting for its verdict
+                row["LLMCache"] = "HIT"
+                row["VerdictSource"] = "CACHE"
+                waiting["rows"].append(row)
+                self.shared += 1
+                return
+
+        cached = self.cache.get(key)
+        if cached:
+            row["LLMVerdict"], row["LLMNotes"] = cached
+            row["LLMCache"] = "HIT"
+            row["VerdictSource"] = "CACHE"
+            self.on_complete(row)
+            return
+
+        row["LLMCache"] = "MISS"
+        row["VerdictSource"] = "LLM"
+        self._pending[key] = {
+            "item": {
+                "op": test_op,
+                "actual_status": actual_status,
+                "actual_body_text": actual_body_text,
+                "kb_context": kb_context,
+                "expected_error": expected_error,
+            },
+            "rows": [row],
+        }
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand the pending batch to the worker pool without waiting for it."""
+        with self._lock:
+            if not self._pending:
+                return
+            batch = list(self._pending.items())
+            self._pending.clear()
+            self._in_flight.update(batch)
+        self._futures.append(self._pool.submit(self._validate_batch, batch))
+
+    def _spec_fragment(self, op: Dict) -> Tuple[str, str]:
+        key = (op.get("path", ""), op["method"])
+        fragments = self._spec_fragments.get(key)
+        if fragments is None:
+            fragments = self._spec_fragments[key] = (
+                extract_operation_spec(self.spec, key[0], key[1]),
+                extract_operation_spec(self.spec, key[0], key[1], include_components=False),
+            )
+        return fragments
+
+    @staticmethod
+    def _build_prompt(spec_text: str, items: List[Dict]) -> str:
+        if len(items) == 1:
+            return build_validation_prompt(spec_text, **items[0])
+        return build_batch_prompt(spec_text, items)
+
+    def _prepare_batch(self, items: List[Dict]) -> Tuple[str, List[Dict], int]:
+        """Fit spec fragment, response bodies and KB chunks into the token budget."""
+        spec_fragment, spec_core = self._spec_fragment(items[0]["op"])
+        bare = [dict(item, actual_body_text="", kb_context=[]) for item in items]
+        fixed_tokens = estimate_tokens(self._build_prompt("", bare))
+        query = " ".join(f"{item['op'].get('description', '')} {item['expected_error']}" for item in items)
+        kb_chunks = list(dict.fromkeys(chunk for item in items for chunk in item["kb_context"] or []))
+        spec_text, bodies, chunks = fit_prompt_parts(
+            spec_fragment,
+            [item["actual_body_text"] for item in items],
+            kb_chunks,
+            query,
+            self.token_budget,
+            fixed_tokens=fixed_tokens,
+            spec_fragment_without_components=spec_core,
+        )
+        prepared = [dict(item, actual_body_text=body, kb_context=chunks) for item, body in zip(items, bodies)]
+        return spec_text, prepared, estimate_tokens(self._build_prompt(spec_text, prepared))
+
+    def _validate_batch(self, batch) -> None:
+        prompt_tokens = 0
+        try:
+            spec_text, items, prompt_tokens = self._prepare_batch([entry["item"] for _, entry in batch])
+            # Every LLM request, including per-test fallbacks, waits for a rate limiter slot
+            verdicts = llm_validate_batch_with_kb(
+                spec_text, items, self.api_key, self.model, acquire=self._rate_limiter.acquire
+            )
+        except Exception as e:
+            verdicts = [("UNSURE", f"LLM error: {e}")] * len(batch)
+        with self._lock:
+            self.llm_calls += 1
+            self.prompt_tokens += prompt_tokens
+            # Tests sharing a verdict via the cache or de-duplication cost no prompt tokens
+            share = -(-prompt_tokens // len(batch))
+            for _, entry in batch:
+                entry["rows"][0]["PromptTokens"] = share
+            for (key, entry), (verdict, notes) in zip(batch, verdicts):
+                for row in entry["rows"]:
+                    row["LLMVerdict"], row["LLMNotes"] = verdict, notes
+                self._in_flight.pop(key, None)
+                if not notes.startswith(_UNCACHEABLE_NOTES):
+                    self.cache.put(key, verdict, notes)
+        for _, entry in batch:
+            for row in entry["rows"]:
+                self.on_complete(row)
+
+    def close(self) -> None:
+        """Flush, wait until every verdict has been joined into its row and persist the cache."""
+        self.flush()
+        wait(self._futures)
+        self._futures.clear()
+        self._pool.shutdown(wait=True)
+        if self.use_llm_validation:
+            self.cache.save()
+
+    def summary(self) -> str:
+        share = 100.0 * self.decided_locally / self.total if self.total else 0.0
+        return (
+            f"{self.decided_locally}/{self.total} verdicts decided locally ({share:.1f}%), "
+            f"{self.cache.hits} cache hits, {self.cache.misses} misses, "
+            f"{self.shared} shared within a batch, {self.llm_calls} LLM batches "
+            f"(~{self.prompt_tokens} prompt tokens)"
+        )
@@ -1,37 +1,23 @@
 import json
 import re
-from typing import List, Dict, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from config import PERPLEXITY_MODEL
 
 try:
     from langchain_perplexity import ChatPerplexity
     from langchain_core.prompts import ChatPromptTemplate
+    from llm_client import get_chat, get_prompt_template
 except Exception:
     ChatPerplexity = None
     ChatPromptTemplate = None
 
-def llm_validate_response_with_kb(
-    spec_text: str,
-    op: Dict,
-    actual_status: int,
-    actual_body_text: str,
-    kb_context: List[str],
-    expected_error: str,   # New parameter for expected error message or validation rule
-    api_key: str,
-    model: str = PERPLEXITY_MODEL,
-    use_llm_validation: bool = True
-) -> Tuple[str, str]:
-    if not use_llm_validation or not ChatPerplexity or not ChatPromptTemplate:
-        return "UNSURE", "LLM validation disabled or packages missing."
-    try:
-        llm = ChatPerplexity(model=model, temperature=0, api_key=api_key)
-        kb_text = "\n\nKnowledge Base Context:\n" + "\n---\n".join(kb_context) if kb_context else ""
-        prompt_template = ChatPromptTemplate.from_template("""
+VALIDATION_PROMPT = """
 You are an API testing assistant. Using the OpenAPI spec, observed API response,
 expected error message, and related domain knowledge, decide if the response is logically correct.
 
 OpenAPI Spec:
+{spec_text}
 
 Request:
 - Method: {method}
@@ -55,18 +41,62 @@ Instructions:
 Provide a short rationale.
 
 Return JSON: {{"verdict": "PASS|FAIL|UNSURE", "notes": "explanation"}}
-        """)
-        prompt = prompt_template.format(
-            spec_text=spec_text,
-            method=op["method"],
-            url=op["url"],
-            headers=json.dumps(op.get("headers", {}), ensure_ascii=False),
-            body=json.dumps(op.get("body"), ensure_ascii=False) if op.get("body") is not None else "null",
-            status=actual_status,
-            body_text=actual_body_text[:4000],
-            expected_error=expected_error,
-            kb_text=kb_text
+"""
+
+def _render(template: str, **values) -> str:
+    if ChatPromptTemplate:
+        return get_prompt_template(template).format(**values)
+    return template.format(**values)
+
+
+def _kb_text(kb_context: List[str]) -> str:
+    return "\n\nKnowledge Base Context:\n" + "\n---\n".join(kb_context) if kb_context else ""
+
+
+def build_validation_prompt(
+    spec_text: str,
+    op: Dict,
+    actual_status: int,
+    actual_body_text: str,
+    kb_context: List[str],
+    expected_error: str,
+) -> str:
+    return _render(
+        VALIDATION_PROMPT,
+        spec_text=spec_text,
+        method=op["method"],
+        url=op["url"],
+        headers=json.dumps(op.get("headers", {}), ensure_ascii=False),
+        body=json.dumps(op.get("body"), ensure_ascii=False) if op.get("body") is not None else "null",
+        status=actual_status,
+        body_text=actual_body_text[:4000],
+        expected_error=expected_error,
+        kb_text=_kb_text(kb_context),
+    )
+
+
+def llm_validate_response_with_kb(
+    spec_text: str,
+    op: Dict,
+    actual_status: int,
+    actual_body_text: str,
+    kb_context: List[str],
+    expected_error: str,   # New parameter for expected error message or validation rule
+    api_key: str,
+    model: str = PERPLEXITY_MODEL,
+    use_llm_validation: bool = True,
+    acquire: Optional[Callable[[], None]] = None,
+) -> Tuple[str, str]:
+    """acquire, if given, is called right before the LLM request (e.g. a rate limiter)."""
+    if not use_llm_validation or not ChatPerplexity or not ChatPromptTemplate:
+        return "UNSURE", "LLM validation disabled or packages missing."
+    try:
+        llm = get_chat(model, temperature=0, api_key=api_key)
+        prompt = build_validation_prompt(
+            spec_text, op, actual_status, actual_body_text, kb_context, expected_error
         )
+        if acquire:
+            acquire()
         resp = llm.invoke(prompt)
         raw = resp.content if hasattr(resp, "content") else str(resp)
         m = re.search(r"\{.*\}", raw, re.DOTALL)
@@ -80,3 +110,131 @@ Return JSON: {{"verdict": "PASS|FAIL|UNSURE", "notes": "explanation"}}
         return "UNSURE", "Unparsed LLM output."
     except Exception as e:
         return "UNSURE", f"LLM error: {e}"
+
+
+BATCH_PROMPT = """
+You are an API testing assistant. Using the OpenAPI spec, the observed API responses,
+the expected error messages, and related domain knowledge, decide for each test below
+whether the response is logically correct.
+
+Operation: {method} {path}
+
+OpenAPI Spec:
+{spec_text}
+{kb_text}
+
+Tests:
+{tests_text}
+
+Instructions:
+1) If the status and response body conform to the spec and domain knowledge, answer PASS.
+2) If inconsistencies or errors given domain knowledge, answer FAIL.
+3) Otherwise answer UNSURE.
+Provide a short rationale for every test.
+
+Return a JSON array with exactly one object per test, in any order:
+[{{"id": <test id>, "verdict": "PASS|FAIL|UNSURE", "notes": "explanation"}}]
+"""
+
+
+def _format_batch_test(test_id: int, item: Dict) -> str:
+    op = item["op"]
+    body = op.get("body")
+    return (
+        f"### Test {test_id}: {op.get('description', '')}\n"
+        f"Request:\n"
+        f"- Method: {op['method']}\n"
+        f"- URL: {op['url']}\n"
+        f"- Headers: {json.dumps(op.get('headers', {}), ensure_ascii=False)}\n"
+        f"- Body: {json.dumps(body, ensure_ascii=False) if body is not None else 'null'}\n"
+        f"Observed Response:\n"
+        f"- Status: {item['actual_status']}\n"
+        f"- Body: {item['actual_body_text'][:4000]}\n"
+        f"Expected error message or validation rule:\n"
+        f"{item['expected_error']}\n"
+    )
+
+
+def build_batch_prompt(spec_text: str, items: List[Dict]) -> str:
+    # The KB context is shared by the whole batch, so send each chunk once.
+    kb_chunks = list(dict.fromkeys(chunk for item in items for chunk in item["kb_context"] or []))
+    return _render(
+        BATCH_PROMPT,
+        spec_text=spec_text,
+        method=items[0]["op"]["method"],
+        path=items[0]["op"].get("path", items[0]["op"]["url"]),
+        kb_text=_kb_text(kb_chunks),
+        tests_text="\n".join(_format_batch_test(i, item) for i, item in enumerate(items, 1)),
+    )
+
+
+def _parse_batch_verdicts(raw: str, count: int) -> Dict[int, Tuple[str, str]]:
+    m = re.search(r"\[.*\]", raw, re.DOTALL)
+    if not m:
+        return {}
+    data = json.loads(m.group(0))
+    verdicts = {}
+    for entry in data if isinstance(data, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            test_id = int(entry.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if not 1 <= test_id <= count:
+            continue
+        verdict = str(entry.get("verdict", "UNSURE")).upper()
+        if verdict not in ("PASS", "FAIL", "UNSURE"):
+            verdict = "UNSURE"
+        verdicts[test_id] = (verdict, str(entry.get("notes", "")))
+    return verdicts
+
+
+def llm_validate_batch_with_kb(
+    spec_text: str,
+    items: List[Dict],
+    api_key: str,
+    model: str = PERPLEXITY_MODEL,
+    use_llm_validation: bool = True,
+    acquire: Optional[Callable[[], None]] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Validate several results of the same operation with a single prompt.
+    items: dicts with op, actual_status, actual_body_text, kb_context, expected_error.
+    Tests whose verdict cannot be parsed back from the batch answer fall back
+    to one llm_validate_response_with_kb call each.
+    acquire, if given, is called before every LLM request, including the fallbacks.
+    """
+    if not items:
+        return []
+    if len(items) == 1 or not use_llm_validation or not ChatPerplexity or not ChatPromptTemplate:
+        return [
+            llm_validate_response_with_kb(
+                spec_text, item["op"], item["actual_status"], item["actual_body_text"],
+                item["kb_context"], item["expected_error"], api_key, model, use_llm_validation, acquire,
+            )
+            for item in items
+        ]
+
+    verdicts: Dict[int, Tuple[str, str]] = {}
+    try:
+        llm = get_chat(model, temperature=0, api_key=api_key)
+        prompt = build_batch_prompt(spec_text, items)
+        if acquire:
+            acquire()
+        resp = llm.invoke(prompt)
+        raw = resp.content if hasattr(resp, "content") else str(resp)
+        verdicts = _parse_batch_verdicts(raw, len(items))
+    except Exception as e:
+        print(f"[WARN] Batched LLM validation failed, falling back to per-test calls: {e}")
+
+    results = []
+    for i, item in enumerate(items, 1):
+        if i in verdicts:
+            results.append(verdicts[i])
+        else:
+            results.append(llm_validate_response_with_kb(
+                spec_text, item["op"], item["actual_status"], item["actual_body_text"],
+                item["kb_context"], item["expected_error"], api_key, model, use_llm_validation, acquire,
+            ))
+    return results
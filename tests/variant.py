@@ -0,0 +1,160 @@
+import json
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+# Marker value in a mutation record meaning "remove this header / body field".
+DELETE = object()
+_MISSING = object()
+
+
+def cow_set(root: Any, path: Sequence[str], value: Any) -> Any:
+    """
+    Return root with value stored at path. Only the containers along the path
+    are copied; every untouched sub-tree is shared with root.
+    Digit path items index lists, and non-container nodes on
+    the path are replaced by an empty list/dict.
+    """
+    if not path:
+        return value
+    head, rest = path[0], path[1:]
+    if head.isdigit():
+        idx = int(head)
+        node = list(root) if isinstance(root, list) else []
+        while len(node) <= idx:
+            node.append({} if rest else None)
+    else:
+        idx = head
+        node = dict(root) if isinstance(root, dict) else {}
+    child = node[idx] if isinstance(node, list) else node.get(idx)
+    if rest and not isinstance(child, (dict, list)):
+        child = {}
+    node[idx] = cow_set(child, rest, value)
+    return node
+
+
+def cow_del(root: Any, path: Sequence[str]) -> Any:
+    """
+    Return root without the key/index at path, copying only the containers
+    along the path. A path that does not exist returns root unchanged.
+    """
+    if not path:
+        return root
+    head, rest = path[0], path[1:]
+    if head.isdigit():
+        idx = int(head)
+        if not isinstance(root, list) or len(root) <= idx:
+            return root
+        node = list(root)
+    else:
+        idx = head
+        if not isinstance(root, dict) or idx not in root:
+            return root
+        node = dict(root)
+    if rest:
+        node[idx] = cow_del(node[idx], rest)
+    else:
+        node.pop(idx)
+    return node
+
+
+def _base_body(op: Dict) -> Any:
+    body = op.get("body") or {}
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except Exception:
+            body = {}
+    return body
+
+
+class TestVariant(MutableMapping):
+    """
+    A test case stored as a reference to the shared base operation plus a small
+    mutation record, instead of a deep copy of the whole operation.
+
+    header_changes: ((header_name, value_or_DELETE), ...)
+    body_changes: ((path, value_or_DELETE), ...) applied to the base request body
+    overrides: top-level keys replaced wholesale (description, expected_status, ...)
+
+    The request headers/body are materialised on first access, which normally
+    happens when the request is sent. Every variant gets its own headers dict,
+    so headers can be edited in place. The body is copy-on-write: only the
+    containers along changed paths are copied, and the rest of it (the whole
+    body when there are no body_changes) is the base operation's own object.
+    Treat it as read-only and assign variant["body"] to replace it.
+    The base operation must not be mutated while its variants are alive.
+    """
+
+    __slots__ = ("base", "overrides", "header_changes", "body_changes", "_materialised")
+
+    def __init__(
+        self,
+        base: Dict,
+        description: str,
+        header_changes: Optional[Tuple] = None,
+        body_changes: Optional[Tuple] = None,
+        **overrides: Any,
+    ):
+        self.base = base
+        self.header_changes = tuple(header_changes or ())
+        self.body_changes = tuple(body_changes or ())
+        self.overrides = overrides
+        self.overrides["description"] = description
+        self._materialised: Dict[str, Any] = {}
+
+    def _materialise(self, key: str) -> Any:
+        if key not in self._materialised:
+            if key == "headers":
+                headers = dict(self.base.get("headers") or {})
+                for name, value in self.header_changes:
+                    if value is DELETE:
+                        headers.pop(name, None)
+                    else:
+                        headers[name] = value
+                self._materialised[key] = headers
+            else:
+                body = _base_body(self.base)
+                for path, value in self.body_changes:
+                    body = cow_del(body, path) if value is DELETE else cow_set(body, path, value)
+                self._materialised[key] = body
+        return self._materialised[key]
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.overrides.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if key in self.overrides:
+            raise KeyError(key)
+        if key == "headers":
+            # A copy even without changes; headers are cheap to copy and often edited
+            return self._materialise(key)
+        if key == "body" and self.body_changes:
+            return self._materialise(key)
+        return self.base[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._materialised.pop(key, None)
+        self.overrides[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._materialised.pop(key, None)
+        self.overrides[key] = _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.base:
+            if self.overrides.get(key, None) is not _MISSING:
+                yield key
+        for key, value in self.overrides.items():
+            if key not in self.base and value is not _MISSING:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"TestVariant({self.base.get('method')} {self.base.get('url')}: {self.overrides['description']!r})"
+
+    def to_dict(self) -> Dict:
+        return {key: self[key] for key in self}
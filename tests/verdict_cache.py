@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Response fields whose values (not just their type) decide the verdict.
+ERROR_FIELDS = ("errorCd", "errorMsg", "message", "error", "code", "status")
+
+
+def response_shape(value: Any) -> Any:
+    """
+    Reduce a parsed JSON body to its structure: keys and value types, keeping
+    the values of well-known error fields. Bodies that only differ in ids,
+    timestamps or echoed input map to the same shape.
+    """
+    if isinstance(value, dict):
+        return {
+            k: (v if k in ERROR_FIELDS and not isinstance(v, (dict, list)) else response_shape(v))
+            for k, v in sorted(value.items())
+        }
+    if isinstance(value, list):
+        return [response_shape(value[0])] if value else []
+    if value is None:
+        return "null"
+    return type(value).__name__
+
+
+def _normalise_text(text: str) -> str:
+    text = re.sub(r"\d+", "0", text or "")
+    return re.sub(r"\s+", " ", text).strip()[:2000]
+
+
+def verdict_fingerprint(op: Dict, actual_status: int, actual_body_text: str, expected_error: str) -> str:
+    """Normalised fingerprint of (method, path, status, response shape, expected status/error)."""
+    try:
+        shape = response_shape(json.loads(actual_body_text))
+    except Exception:
+        shape = _normalise_text(actual_body_text)
+    payload = json.dumps(
+        [
+            op.get("method"),
+            op.get("path"),
+            actual_status,
+            shape,
+            op.get("expected_status"),
+            _normalise_text(expected_error),
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """
+    Persistent LLM verdict cache stored as a JSON file.
+    Entries expire after ttl_secs and the least recently used entries are
+    evicted once more than max_entries are stored.
+    """
+
+    def __init__(self, path: str, ttl_secs: int = 7 * 24 * 3600, max_entries: int = 5000):
+        self.path = path
+        self.ttl_secs = ttl_secs
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable LLM verdict cache {self.path}: {e}")
+            return
+        now = time.time()
+        for key, entry in sorted(data.items(), key=lambda kv: kv[1].get("ts", 0)):
+            if now - entry.get("ts", 0) <= self.ttl_secs:
+                self._entries[key] = entry
+
+    def get(self, key: str) -> Optional[Tuple[str, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["ts"] > self.ttl_secs:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["verdict"], entry["notes"]
+
+    def put(self, key: str, verdict: str, notes: str) -> None:
+        with self._lock:
+            self._entries[key] = {"verdict": verdict, "notes": notes, "ts": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            data = dict(self._entries)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
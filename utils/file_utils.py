@@ -1,36 +1,115 @@
-import os
-import fitz  # PyMuPDF
-import docx  # python-docx
-
-def extract_text_from_pdf(pdf_path: str) -> str:
-    doc = fitz.open(pdf_path)
-    # Use get_text() if available, else fallback to getText()
-    # This handles different versions of pymupdf
-    text = ""
-    for page in doc:
-        if hasattr(page, "get_text"):  # Modern method
-            text += page.get_text()
-        else:  # Older versions fallback
-            text += page.getText()
-    return text
-
-def extract_text_from_docx(docx_path: str) -> str:
-    doc = docx.Document(docx_path)
-    return "\n".join(para.text for para in doc.paragraphs)
-
-def extract_texts_from_folder(folder_path: str, file_extensions=['.pdf', '.docx']) -> str:
-    all_text = ""
-    for filename in os.listdir(folder_path):
-        if any(filename.lower().endswith(ext) for ext in file_extensions):
-            full_path = os.path.join(folder_path, filename)
-            try:
-                if filename.lower().endswith('.pdf'):
-                    text = extract_text_from_pdf(full_path)
-                elif filename.lower().endswith('.docx'):
-                    text = extract_text_from_docx(full_path)
-                else:
-                    continue
-                all_text += f"\n\n=== Document: {filename} ===\n\n{text}"
-            except Exception as e:
-                print(f"Warning: Failed to load {filename}: {e}")
-    return all_text
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import fitz  # PyMuPDF
+import docx  # python-docx
+
+# PDFs with more pages are split into page ranges extracted by separate workers.
+PDF_PAGES_PER_TASK = 50
+# DOCX files have no pages; paragraphs are grouped into pages of about this many characters.
+DOCX_PAGE_CHARS = 3000
+
+def iter_pdf_pages(pdf_path: str, first_page: int = 0, last_page: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """Yield (page number, text) one page at a time; page numbers start at 1."""
+    doc = fitz.open(pdf_path)
+    try:
+        last_page = len(doc) if last_page is None else min(last_page, len(doc))
+        # Use get_text() if available, else fallback to getText()
+        # This handles different versions of pymupdf
+        for i in range(first_page, last_page):
+            page = doc[i]
+            if hasattr(page, "get_text"):  # Modern method
+                yield i + 1, page.get_text()
+            else:  # Older versions fallback
+                yield i + 1, page.getText()
+    finally:
+        doc.close()
+
+def extract_text_from_pdf(pdf_path: str, first_page: int = 0, last_page: Optional[int] = None) -> str:
+    return "".join(text for _, text in iter_pdf_pages(pdf_path, first_page, last_page))
+
+def pdf_page_count(pdf_path: str) -> int:
+    doc = fitz.open(pdf_path)
+    try:
+        return len(doc)
+    finally:
+        doc.close()
+
+def iter_docx_pages(docx_path: str) -> Iterator[Tuple[int, str]]:
+    """Yield (page number, text) for blocks of about DOCX_PAGE_CHARS characters of paragraphs."""
+    doc = docx.Document(docx_path)
+    page, lines, size = 1, [], 0
+    for para in doc.paragraphs:
+        if lines and size >= DOCX_PAGE_CHARS:
+            yield page, "\n".join(lines) + "\n"
+            page, lines, size = page + 1, [], 0
+        lines.append(para.text)
+        size += len(para.text) + 1
+    if lines:
+        yield page, "\n".join(lines)
+
+def extract_text_from_docx(docx_path: str) -> str:
+    doc = docx.Document(docx_path)
+    return "\n".join(para.text for para in doc.paragraphs)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+
+def iter_pages(path: str, first_page: Optional[int] = None, last_page: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    if path.lower().endswith('.pdf'):
+        return iter_pdf_pages(path, first_page or 0, last_page)
+    if path.lower().endswith('.docx'):
+        return iter_docx_pages(path)
+    raise ValueError(f"Unsupported document type: {path}")
+
+def extraction_tasks(paths: List[str]) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    """One (path, first_page, last_page) task per document, or per page range of large PDFs."""
+    tasks = []
+    for path in paths:
+        pages = 0
+        if path.lower().endswith('.pdf'):
+            try:
+                pages = pdf_page_count(path)
+            except Exception:
+                pages = 0  # The extraction task reports the error
+        if pages > PDF_PAGES_PER_TASK:
+            tasks.extend((path, start, start + PDF_PAGES_PER_TASK) for start in range(0, pages, PDF_PAGES_PER_TASK))
+        else:
+            tasks.append((path, None, None))
+    return tasks
+
+def run_extraction_tasks(
+    func: Callable, tasks: List[Tuple], max_workers: Optional[int] = None
+) -> List[Tuple]:
+    """
+    Run func(*task) for every task on a process pool (PDF parsing is CPU bound),
+    or inline when there is a single task or worker. func is a module-level
+    function returning (result, chars, seconds, error).
+    """
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(func, *zip(*tasks)))
+    return [func(*task) for task in tasks]
+
+def extraction_stats(paths: List[str], tasks: List[Tuple], results: List[Tuple]) -> List[Dict]:
+    """Per-file stats: file, seconds (summed over its tasks), tasks, chars and the first error."""
+    stats = {path: {"file": path, "seconds": 0.0, "tasks": 0, "chars": 0, "error": None} for path in paths}
+    for task, (_, chars, seconds, error) in zip(tasks, results):
+        stat = stats[task[0]]
+        stat["seconds"] += seconds
+        stat["tasks"] += 1
+        stat["chars"] += chars
+        stat["error"] = stat["error"] or error
+    return list(stats.values())
+
+def print_extraction_stats(stats: List[Dict], wall_secs: float) -> None:
+    for stat in stats:
+        name = os.path.basename(stat["file"])
+        if stat["error"]:
+            print(f"Warning: Failed to load {name}: {stat['error']}")
+        else:
+            print(f"[KB] Extracted {name}: {stat['chars']} chars in {stat['seconds']:.2f}s ({stat['tasks']} task(s))")
+    failed = sum(1 for stat in stats if stat["error"])
+    cpu_secs = sum(stat["seconds"] for stat in stats)
+    print(f"[KB] Extracted {len(stats) - failed}/{len(stats)} documents in {wall_secs:.2f}s "
+          f"({cpu_secs:.2f}s of extraction work, {failed} failed)")
@@ -1,3 +1,12 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Iterable, Iterator
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
 def chunk_text(text: str, chunk_size=1000, overlap=200) -> list[str]:
     chunks = []
     start = 0
@@ -7,7 +16,79 @@ def chunk_text(text: str, chunk_size=1000, overlap=200) -> list[str]:
         start += chunk_size - overlap
     return chunks
 
+def iter_chunks(pages: Iterable[tuple], chunk_size=1000, overlap=200) -> Iterator[tuple]:
+    """
+    Stream (chunk, page) pairs from (page, text) pairs. Chunk boundaries are
+    the same as chunk_text over the concatenated text, but only one chunk plus
+    one page is held in memory. page is the page the chunk starts on.
+    """
+    step = chunk_size - overlap
+    buf = ""
+    marks = []  # (offset in buf, page) of every page start still in buf
+    for page, text in pages:
+        if not text:
+            continue
+        if not buf:
+            marks = []
+        marks.append((len(buf), page))
+        buf += text
+        while len(buf) >= chunk_size:
+            yield buf[:chunk_size], marks[0][1]
+            buf, marks = buf[step:], _shift_marks(marks, step)
+    while buf:
+        yield buf[:chunk_size], marks[0][1]
+        buf, marks = buf[step:], _shift_marks(marks, step)
+
+def _shift_marks(marks: list, n: int) -> list:
+    shifted = [(offset - n, page) for offset, page in marks]
+    # Keep the mark of the page the buffer now starts in
+    first = max(i for i, (offset, _) in enumerate(shifted) if offset <= 0)
+    return shifted[first:]
+
 def simple_search(chunks: list[str], query: str, top_k=3) -> list[str]:
     scored = [(chunk.lower().count(query.lower()), chunk) for chunk in chunks if query.lower() in chunk.lower()]
     scored.sort(key=lambda x: x[0], reverse=True)
     return [c for _, c in scored[:top_k]] if scored else chunks[:top_k]
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Inverted index over a list of chunks with Okapi BM25 scoring.
+    Built once; a query only walks the posting lists of its own terms.
+    """
+
+    def __init__(self, chunks: list[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_count = len(chunks)
+        self.doc_lengths = []
+        # term -> [(chunk index, term frequency), ...]
+        self.postings = defaultdict(list)
+        for doc_id, chunk in enumerate(chunks):
+            terms = Counter(tokenize(chunk))
+            self.doc_lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((doc_id, tf))
+        self.postings = dict(self.postings)
+        self.avg_doc_length = sum(self.doc_lengths) / self.doc_count if self.doc_count else 0.0
+        self.idf = {
+            term: math.log(1 + (self.doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def search(self, query: str, top_k=3) -> list[tuple[int, float]]:
+        """Return up to top_k (chunk index, score) pairs, best first."""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for doc_id, tf in docs:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_doc_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))